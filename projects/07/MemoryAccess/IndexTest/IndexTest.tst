@@ -0,0 +1,20 @@
+// File name: projects/07/MemoryAccess/IndexTest/IndexTest.tst
+
+load IndexTest.asm,
+output-file IndexTest.out,
+compare-to IndexTest.cmp,
+output-list RAM[256]%D1.6.1 RAM[300]%D1.6.1 RAM[309]%D1.6.1
+            RAM[402]%D1.6.1 RAM[407]%D1.6.1 RAM[3006]%D1.6.1
+            RAM[3012]%D1.6.1 RAM[3011]%D1.6.1 RAM[3025]%D1.6.1;
+
+set RAM[0] 256,   // stack pointer
+set RAM[1] 300,   // base address of the local segment
+set RAM[2] 400,   // base address of the argument segment
+set RAM[3] 3000,  // base address of the this segment
+set RAM[4] 3010,  // base address of the that segment
+
+repeat 600 {      // enough cycles to complete the execution
+  ticktock;
+}
+
+output;
@@ -1,18 +1,51 @@
 import argparse
+import os
+import sys
+import time
 
-from runner import Runner
+from batch import BatchRunner, expand_inputs
+from encoder import OUTPUT_FORMATS, HACK_FORMAT
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        description="Assemble input file into hack machine code."
+        description="Assemble input file(s) into hack machine code."
+    )
+    parser.add_argument(
+        "input_files",
+        nargs="+",
+        help="Assembly files, directories or glob patterns to convert.",
+    )
+    parser.add_argument(
+        "--multi-pass",
+        action="store_true",
+        help="Use the original three-pass assembler instead of parsing once.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=HACK_FORMAT,
+        help="Write text .hack output or a packed little-endian binary ROM.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (0 for one per CPU).",
     )
-    parser.add_argument("input_file", help="Name of assembly file to convert.")
     args = parser.parse_args()
-    input_fname = args.input_file
-    if not input_fname.endswith(".asm"):
-        raise ValueError("Input file must be .asm")
+    input_fnames = expand_inputs(args.input_files)
+    jobs = args.jobs or os.cpu_count()
 
-    output_fname = input_fname[:-3] + "hack"
+    start = time.perf_counter()
+    results = BatchRunner(input_fnames, jobs).run(args.format, args.multi_pass)
+    summary, errors = BatchRunner.summarize(
+        results, time.perf_counter() - start
+    )
 
-    Runner(input_fname).run(output_fname)
+    if len(results) > 1:
+        print(summary)
+    elif errors:
+        print(errors[0], file=sys.stderr)
+    if errors:
+        sys.exit(1)
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+import os
+import time
+
+from encoder import HACK_FORMAT
+from runner import Runner
+
+
+def expand_inputs(inputs):
+    """
+    Resolves .asm files, directories and glob patterns into a sorted list of
+    unique .asm file names.
+    """
+    fnames = set()
+    for input_name in inputs:
+        if os.path.isdir(input_name):
+            matches = glob(os.path.join(input_name, "*.asm"))
+        elif os.path.isfile(input_name):
+            matches = [input_name]
+        else:
+            matches = glob(input_name)
+            if not matches:
+                raise ValueError(f'No files match "{input_name}"')
+
+        for fname in matches:
+            if not fname.endswith(".asm"):
+                raise ValueError(f'Input file "{fname}" must be .asm')
+            fnames.add(fname)
+
+    return sorted(fnames)
+
+
+def output_fname_for(input_fname, out_format):
+    return input_fname[:-3] + out_format
+
+
+def assemble_file(input_fname, out_format=HACK_FORMAT, multi_pass=False):
+    """
+    Assembles one file, returning (out_fname, seconds, error). Errors are
+    returned as text rather than raised so one bad file does not abort the
+    rest of a batch.
+    """
+    out_fname = output_fname_for(input_fname, out_format)
+    start = time.perf_counter()
+    try:
+        runner = Runner(input_fname)
+        if multi_pass:
+            if out_format != HACK_FORMAT:
+                raise ValueError("Multi-pass assembly only writes .hack output")
+            runner.run_multi_pass(out_fname)
+        else:
+            runner.run(out_fname, out_format)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return out_fname, time.perf_counter() - start, error
+
+
+class BatchRunner(object):
+    def __init__(self, input_fnames, jobs=1):
+        self._in_fnames = list(input_fnames)
+        self._jobs = jobs
+
+    def run(self, out_format=HACK_FORMAT, multi_pass=False):
+        """
+        Assembles every input, in a process pool when jobs > 1. Each file
+        writes only its own output, and results are returned in input order
+        regardless of completion order.
+        """
+        formats = [out_format] * len(self._in_fnames)
+        multi_passes = [multi_pass] * len(self._in_fnames)
+        if self._jobs > 1 and len(self._in_fnames) > 1:
+            with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+                results = list(
+                    executor.map(
+                        assemble_file, self._in_fnames, formats, multi_passes
+                    )
+                )
+        else:
+            results = list(
+                map(assemble_file, self._in_fnames, formats, multi_passes)
+            )
+
+        return list(zip(self._in_fnames, results))
+
+    @staticmethod
+    def summarize(results, wall_time):
+        lines = []
+        errors = []
+        for in_fname, (out_fname, elapsed, error) in results:
+            status = "FAILED" if error else "ok"
+            lines.append(f"{status:<8}{elapsed * 1000:>9.1f}ms  {in_fname}")
+            if error:
+                errors.append(f"{in_fname}: {error}")
+
+        total = sum(elapsed for _, (_, elapsed, _) in results)
+        lines.append(
+            f"Assembled {len(results) - len(errors)}/{len(results)} files in "
+            f"{wall_time * 1000:.1f}ms wall, {total * 1000:.1f}ms total"
+        )
+        if errors:
+            lines.append(f"{len(errors)} error(s):")
+            lines.extend(f"  {error}" for error in errors)
+
+        return "\n".join(lines), errors
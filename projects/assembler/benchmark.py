@@ -0,0 +1,71 @@
+import argparse
+import filecmp
+from glob import glob
+import os
+import tempfile
+import time
+
+from runner import Runner
+
+
+_DEFAULT_INPUTS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "06", "*", "*.asm"
+)
+
+
+def _time_best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _bench_file(asm_fname, repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        multi_out = os.path.join(tmp_dir, "multi.hack")
+        single_out = os.path.join(tmp_dir, "single.hack")
+        runner = Runner(asm_fname)
+
+        multi = _time_best_of(lambda: runner.run_multi_pass(multi_out), repeat)
+        single = _time_best_of(lambda: runner.run(single_out), repeat)
+        if not filecmp.cmp(multi_out, single_out, shallow=False):
+            raise AssertionError(f"Output mismatch for {asm_fname}")
+
+    return multi, single
+
+
+def _count_lines(fname):
+    with open(fname, "r") as f:
+        return sum(1 for _ in f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare single-pass and multi-pass assembly times."
+    )
+    parser.add_argument(
+        "input_files",
+        nargs="*",
+        help="Assembly files to benchmark. Defaults to the project 06 files.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per file, best is kept."
+    )
+    args = parser.parse_args()
+    fnames = args.input_files or sorted(glob(_DEFAULT_INPUTS))
+
+    print(
+        f"{'file':<30}{'lines':>8}{'multi-pass':>12}{'single-pass':>13}"
+        f"{'speedup':>9}{'lines/s':>12}"
+    )
+    for fname in fnames:
+        n_lines = _count_lines(fname)
+        multi, single = _bench_file(fname, args.repeat)
+        print(
+            f"{os.path.basename(fname):<30}{n_lines:>8}{multi * 1000:>10.1f}ms"
+            f"{single * 1000:>11.1f}ms{multi / single:>8.2f}x"
+            f"{n_lines / single:>12,.0f}"
+        )
@@ -1,3 +1,12 @@
+from array import array
+import sys
+
+
+HACK_FORMAT = "hack"
+BINARY_FORMAT = "bin"
+OUTPUT_FORMATS = [HACK_FORMAT, BINARY_FORMAT]
+
+
 class Encoder(object):
 
     CMD_MAP = {
@@ -51,6 +60,12 @@ class Encoder(object):
         "JMP": "111",
     }
 
+    CMD_BITS = {cmd: int(code, 2) for cmd, code in CMD_MAP.items()}
+    DEST_BITS = {dest: int(code, 2) for dest, code in DEST_MAP.items()}
+    JMP_BITS = {jmp: int(code, 2) for jmp, code in JMP_MAP.items()}
+    C_PREFIX = 0b111 << 13
+    MAX_A_VAL = (1 << 15) - 1
+
     @staticmethod
     def encode_a(a_val):
         return "{0:016b}".format(int(a_val))
@@ -61,11 +76,46 @@ class Encoder(object):
             raise ValueError(f'Bad destination "{dest}"')
         if cmd not in cls.CMD_MAP:
             raise ValueError(f'Bad command "{cmd}"')
-        if cmd not in cls.CMD_MAP:
-            raise ValueError(f'Bad command "{cmd}"')
+        if jmp not in cls.JMP_MAP:
+            raise ValueError(f'Bad jump "{jmp}"')
 
         return "111{cmd_code}{dest_code}{jmp_code}".format(
             cmd_code=cls.CMD_MAP[cmd],
             dest_code=cls.DEST_MAP[dest],
             jmp_code=cls.JMP_MAP[jmp],
         )
+
+    @classmethod
+    def encode_a_int(cls, a_val):
+        a_val = int(a_val)
+        if not 0 <= a_val <= cls.MAX_A_VAL:
+            raise ValueError(f'A instruction value "{a_val}" out of range')
+        return a_val
+
+    @classmethod
+    def encode_c_int(cls, dest, cmd, jmp):
+        try:
+            return (
+                cls.C_PREFIX
+                | cls.CMD_BITS[cmd] << 6
+                | cls.DEST_BITS[dest] << 3
+                | cls.JMP_BITS[jmp]
+            )
+        except KeyError:
+            # defer to the string encoder for a descriptive error
+            cls.encode_c(dest, cmd, jmp)
+            raise
+
+    @staticmethod
+    def to_hack_text(words):
+        return "".join(f"{word:016b}\n" for word in words)
+
+    @staticmethod
+    def to_binary(words):
+        """
+        Packs 16 bit instruction words into a little-endian ROM image.
+        """
+        rom = array("H", words)
+        if sys.byteorder != "little":
+            rom.byteswap()
+        return rom.tobytes()
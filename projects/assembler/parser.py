@@ -1,36 +1,45 @@
 import re
 
 
+_SYMBOL = r"[a-zA-Z_\.\$:]+[a-zA-Z0-9_\.\$:]*"
+_SYMBOL_RE = re.compile(_SYMBOL)
+_A_VAL_RE = re.compile(r"[0-9]+|" + _SYMBOL)
+_COMMENT_RE = re.compile(r"\s*//.*$")
+
+_LABEL_LINE_RE = re.compile(r"\((" + _SYMBOL + r")\)")
+_A_LINE_RE = re.compile(r"@(?:([0-9]+)|(" + _SYMBOL + r"))")
+_C_LINE_RE = re.compile(r"(?:([AMD]+)=)?([^=;\s]+)(?:;(J[A-Z]{2}))?")
+
+
 class ParsingException(Exception):
     pass
 
 
 class Parser(object):
     A_INSTRUCTION = "A_INSTRUCTION"
+    A_LITERAL = "A_LITERAL"
+    A_SYMBOL = "A_SYMBOL"
     C_INSTRUCTION = "C_INSTRUCTION"
     LABEL_DECLARATION = "LABEL_DECLARATION"
 
     @staticmethod
     def _validate_label(label):
-        if not re.match(r"[a-zA-Z_\.\$:]+[a-zA-Z0-9_\.\$:]*", label):
+        if not _SYMBOL_RE.match(label):
             raise ParsingException(
                 f'Label "{label}" includes invalid characters'
             )
 
     @staticmethod
     def _validate_a_val(a_val):
-        if not re.match(r"[0-9]+", a_val) and not re.match(
-            r"[a-zA-Z_\.\$:]+[a-zA-Z0-9_\.\$:]*", a_val
-        ):
+        if not _A_VAL_RE.match(a_val):
             raise ParsingException(
                 f'A instruction value "{a_val}" includes invalid characters'
             )
 
+    @staticmethod
     def _validate_c_instruction(line):
-        if len(line.split(";")) > 2:
-            raise ParsingException('Invalid instruction: "{line"}')
-        elif len(line.split("=")) > 2:
-            raise ParsingException('Invalid instruction: "{line"}')
+        if line.count(";") > 1 or line.count("=") > 1:
+            raise ParsingException(f'Invalid instruction: "{line}"')
 
     @classmethod
     def parse_lines(cls, fname):
@@ -40,7 +49,7 @@ class Parser(object):
                 if not line or line.startswith("//"):
                     continue
 
-                line = re.sub(r"\s*//.*$", "", line)
+                line = _COMMENT_RE.sub("", line)
 
                 if line.startswith("("):
                     label = line[1:-1]
@@ -63,3 +72,50 @@ class Parser(object):
                         cmd, jmp = line, None
 
                     yield [dest, cmd, jmp], cls.C_INSTRUCTION
+
+    @classmethod
+    def tokenize(cls, fname):
+        """
+        Like parse_lines, but classifies each line with a single match of a
+        precompiled pattern picked by its first character. A instructions
+        are split into A_LITERAL, carrying the parsed int, and A_SYMBOL, so
+        later stages never need to re-examine the text.
+        """
+        with open(fname, "r") as f:
+            yield from cls.tokenize_lines(f, fname)
+
+    @classmethod
+    def tokenize_lines(cls, lines, source="<memory>"):
+        """
+        Tokenizes assembly lines from any iterable, such as the VM
+        translator produces in memory. source names them in errors.
+        """
+        for line_no, line in enumerate(lines, 1):
+            line = line.partition("//")[0].strip()
+            if not line:
+                continue
+
+            first = line[0]
+            if first == "(":
+                match = _LABEL_LINE_RE.fullmatch(line)
+                if match:
+                    yield [match.group(1)], cls.LABEL_DECLARATION
+                    continue
+            elif first == "@":
+                match = _A_LINE_RE.fullmatch(line)
+                if match:
+                    literal, symbol = match.groups()
+                    if literal is not None:
+                        yield [int(literal)], cls.A_LITERAL
+                    else:
+                        yield [symbol], cls.A_SYMBOL
+                    continue
+            else:
+                match = _C_LINE_RE.fullmatch(line)
+                if match:
+                    yield list(match.groups()), cls.C_INSTRUCTION
+                    continue
+
+            raise ParsingException(
+                f'{source}:{line_no}: Invalid instruction "{line}"'
+            )
@@ -1,7 +1,8 @@
+from array import array
 import re
 
 from parser import Parser
-from encoder import Encoder
+from encoder import Encoder, HACK_FORMAT, BINARY_FORMAT
 from symbol_table import SymbolTable
 
 
@@ -13,10 +14,82 @@ class Runner(object):
     def __init__(self, input_fname):
         self._in_fname = input_fname
 
-    def run(self, out_fname):
+    def run(self, out_fname, out_format=HACK_FORMAT):
+        self._write_words(out_fname, self.assemble(), out_format)
+
+    def assemble(self):
+        """
+        Returns the program as an array of 16 bit instruction words.
+        """
+        return self.assemble_tokens(Parser.tokenize(self._in_fname))
+
+    @classmethod
+    def assemble_tokens(cls, tokenized_lines):
+        """
+        Assembles lines as Parser.tokenize_lines yields them, without a
+        source file.
+        """
+        instructions, sym_tab = cls._parse(tokenized_lines)
+        return cls._encode(instructions, sym_tab)
+
+    def run_multi_pass(self, out_fname):
+        """
+        Original three-pass assembly: labels, variables, then encoding, each
+        re-reading the source file. Kept as a baseline for benchmarking.
+        """
         sym_tab = self._build_symbol_table()
         self._write(out_fname, sym_tab)
 
+    @staticmethod
+    def _parse(tokenized_lines):
+        """
+        Reads the source once, recording label addresses as they are declared
+        and keeping every A and C instruction in memory for encoding.
+        """
+        sym_tab = SymbolTable()
+        instructions = []
+        for tokens, instr_type in tokenized_lines:
+            if instr_type == Parser.LABEL_DECLARATION:
+                sym_tab[tokens[0]] = len(instructions)
+            else:
+                instructions.append((tokens, instr_type))
+
+        return instructions, sym_tab
+
+    @staticmethod
+    def _encode(instructions, sym_tab):
+        # every label is known by now, so any unknown symbol is a variable,
+        # allocated in order of first use just like the multi-pass path
+        mem_addr = 16
+        words = array("H")
+        for tokens, instr_type in instructions:
+            if instr_type == Parser.A_LITERAL:
+                val = Encoder.encode_a_int(tokens[0])
+            elif instr_type == Parser.A_SYMBOL:
+                if tokens[0] not in sym_tab:
+                    sym_tab[tokens[0]] = mem_addr
+                    mem_addr += 1
+                val = sym_tab[tokens[0]]
+            elif instr_type == Parser.C_INSTRUCTION:
+                val = Encoder.encode_c_int(tokens[0], tokens[1], tokens[2])
+            else:
+                raise ValueError(f"Unexpected instruction type {instr_type}")
+
+            words.append(val)
+
+        return words
+
+    @staticmethod
+    def _write_words(out_fname, words, out_format):
+        if out_format == HACK_FORMAT:
+            with open(out_fname, "w") as out_f:
+                out_f.write(Encoder.to_hack_text(words))
+        elif out_format == BINARY_FORMAT:
+            with open(out_fname, "wb") as out_f:
+                out_f.write(Encoder.to_binary(words))
+        else:
+            raise ValueError(f"Unknown output format {out_format}")
+
     def _build_symbol_table(self):
         sym_tab = SymbolTable()
         line_no = 0
@@ -1,5 +1,7 @@
 import argparse
 import os
+import sys
+import time
 
 from runner import Runner
 
@@ -12,6 +14,39 @@ if __name__ == "__main__":
         "input_file",
         help="Name of jack file to comile, or directory with jack files.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes compiling classes (0 for one per "
+        "CPU).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompile every class, even those the build manifest records "
+        "as up to date.",
+    )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="Compile with the single pass engine instead of building a "
+        "syntax tree first.",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Fold constant expressions, replace multiplications by powers "
+        "of two with doubling and branch on conditions without comparing "
+        "them to 0.",
+    )
+    parser.add_argument(
+        "--pool-strings",
+        action="store_true",
+        help="Build each string literal once, the first time it is "
+        "evaluated, and reuse it afterwards. The program must not modify or "
+        "dispose of literals.",
+    )
     args = parser.parse_args()
     input_fname = args.input_file
     if os.path.isfile(input_fname) and not input_fname.endswith(".jack"):
@@ -21,4 +56,20 @@ if __name__ == "__main__":
     ):
         raise ValueError("Directory contains no .jack files")
 
-    Runner(input_fname).run()
+    start = time.perf_counter()
+    results = Runner(
+        input_fname,
+        jobs=args.jobs or os.cpu_count(),
+        force=args.force,
+        single_pass=args.single_pass,
+        optimize=args.optimize,
+        pool_strings=args.pool_strings,
+    ).run()
+    summary, errors = Runner.summarize(results, time.perf_counter() - start)
+
+    if len(results) > 1:
+        print(summary)
+    elif errors:
+        print(errors[0], file=sys.stderr)
+    if errors:
+        sys.exit(1)
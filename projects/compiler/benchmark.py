@@ -0,0 +1,159 @@
+import argparse
+from glob import glob
+import os
+import re
+import time
+
+from tokenizer import (
+    KEYWORDS,
+    SYMBOLS,
+    SYMBOL,
+    KEYWORD,
+    STRING_CONSTANT,
+    INT_CONSTANT,
+    IDENTIFIER,
+    Token,
+    Tokenizer,
+    TokenizerException,
+)
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_INPUTS = [
+    os.path.join(_PROJECTS_DIR, project, "*", "*.jack")
+    for project in ["09", "10", "11"]
+]
+
+
+class LegacyTokenizer(Tokenizer):
+    """
+    The original character-by-character tokenizer, kept to benchmark and
+    cross-check the regex tokenizer. It does not record positions and only
+    understands /** */ block comments.
+    """
+
+    def _token_stream(self):
+        file_data = open(self._jack_fname, "r").read()
+        file_data = re.sub(r"\/\/.*\n", "", file_data)
+        block_regex = re.compile(r"\/\*\*(.|\s)*?\*\/", re.MULTILINE)
+        file_data = re.sub(block_regex, "", file_data)
+        course_tokens = re.split(r"\s+", file_data)
+
+        token = ""
+        in_str = False
+        for course_token in course_tokens:
+            if in_str:
+                token += " "
+            for char in course_token:
+                prev_char = token[-1] if token else None
+                if char == '"' and prev_char != "\\" and not in_str:
+                    token += char
+                    in_str = True
+                    continue
+                elif char == '"' and prev_char != "\\":
+                    token += char
+                    in_str = False
+                    yield Token(token, self._type_for(token))
+                    token = ""
+                    continue
+                elif in_str:
+                    token += char
+                    continue
+
+                if char in SYMBOLS:
+                    if token:
+                        yield Token(token, self._type_for(token))
+                        token = ""
+                    yield Token(char, SYMBOL)
+                else:
+                    token += char
+
+            if token and not in_str:
+                yield Token(token, self._type_for(token))
+                token = ""
+
+    def _type_for(self, token):
+        if token in KEYWORDS:
+            return KEYWORD
+        elif re.match(r'^"[^"]*"$', token):
+            return STRING_CONSTANT
+        elif re.match(r"^[0-9]+$", token):
+            return INT_CONSTANT
+        elif re.match(r"[a-zA-Z_]+[a-zA-Z_0-9]*", token):
+            return IDENTIFIER
+        else:
+            raise ValueError(f"Unable to identify token {token}")
+
+
+def _tokens(tokenizer_class, jack_fname):
+    tokenizer = tokenizer_class(jack_fname)
+    return [(t.value, t.type) for t in iter(tokenizer.next_token, None)]
+
+
+def _time_best_of(funcs, repeat):
+    """
+    Returns the best time of each function, alternating between them so
+    they all run under the same machine load.
+    """
+    best = [None] * len(funcs)
+    for _ in range(repeat):
+        for idx, func in enumerate(funcs):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if best[idx] is None or elapsed < best[idx]:
+                best[idx] = elapsed
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the regex tokenizer with the original one on "
+        "Jack files."
+    )
+    parser.add_argument(
+        "jack_files",
+        nargs="*",
+        help="Jack files to tokenize. Defaults to projects 09 to 11.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Runs per tokenizer, best kept."
+    )
+    args = parser.parse_args()
+    jack_fnames = args.jack_files or sorted(
+        f for pattern in _DEFAULT_INPUTS for f in glob(pattern)
+    )
+
+    # files the original tokenizer cannot read are reported and left out of
+    # the timing
+    fnames = []
+    n_tokens = 0
+    for jack_fname in jack_fnames:
+        tokens = _tokens(Tokenizer, jack_fname)
+        try:
+            legacy_tokens = _tokens(LegacyTokenizer, jack_fname)
+        except (ValueError, TokenizerException) as e:
+            print(f"Legacy tokenizer failed on {jack_fname}: {e}")
+            continue
+        if legacy_tokens != tokens:
+            print(f"Token mismatch in {jack_fname}")
+            continue
+        fnames.append(jack_fname)
+        n_tokens += len(tokens)
+
+    tokenizers = {"legacy": LegacyTokenizer, "regex": Tokenizer}
+    seconds = _time_best_of(
+        [
+            lambda cls=cls: [_tokens(cls, f) for f in fnames]
+            for cls in tokenizers.values()
+        ],
+        args.repeat,
+    )
+    times = dict(zip(tokenizers, seconds))
+
+    print(f"{len(fnames)} files, {n_tokens} tokens")
+    for name, seconds in times.items():
+        print(
+            f"{name:<8}{seconds:>10.4f}s{n_tokens / seconds:>14,.0f} tokens/s"
+        )
+    print(f"speedup {times['legacy'] / times['regex']:.1f}x")
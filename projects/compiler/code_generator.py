@@ -0,0 +1,386 @@
+from compilation_engine import CompilationException
+from symbol_table import SymbolTable
+from syntax_tree import (
+    SHIFT_LEFT,
+    IntegerConstant,
+    StringConstant,
+    KeywordConstant,
+    VarRef,
+    ArrayRef,
+    SubroutineCall,
+    UnaryOp,
+    BinaryOp,
+)
+from tokenizer import (
+    TRUE,
+    FALSE,
+    NULL,
+    THIS,
+    STATIC,
+    METHOD,
+    CONSTRUCTOR,
+    VOID,
+)
+from vm_writer import VMWriter
+
+
+_SEGMENTS = {
+    SymbolTable.STATIC: STATIC,
+    SymbolTable.FIELD: THIS,
+    SymbolTable.ARG: "argument",
+    SymbolTable.VAR: "local",
+}
+
+
+def _is_boolean(node):
+    """
+    Whether the expression can only evaluate to true (-1) or false (0).
+    """
+    if isinstance(node, BinaryOp):
+        if node.op in ["<", ">", "="]:
+            return True
+        return node.op in ["&", "|"] and (
+            _is_boolean(node.left) and _is_boolean(node.right)
+        )
+    elif isinstance(node, UnaryOp):
+        return node.op == "~" and _is_boolean(node.operand)
+    elif isinstance(node, KeywordConstant):
+        return node.value in [TRUE, FALSE]
+    elif isinstance(node, IntegerConstant):
+        return node.value in [0, -1]
+    return False
+
+
+class CodeGenerator(object):
+    """
+    Writes the VM code of a class syntax tree. The output is the same as
+    CompilationEngine's for the same source, labels included, unless
+    optimize is set.
+
+    With optimize, conditions are branched on without comparing them to 0.
+    Boolean conditions of if statements are negated with not, or have their
+    own ~ dropped, and while loops test their condition at the bottom,
+    jumping back to the body while it holds.
+
+    With pool_strings, each distinct string literal of the class is built
+    the first time it is evaluated and kept in a static variable after the
+    class's own, so later evaluations return the same String. Programs must
+    then neither modify nor dispose of literals.
+    """
+
+    def __init__(self, optimize=False, pool_strings=False):
+        self._optimize = optimize
+        self._pool_strings = pool_strings
+        self._string_slots = {}
+        self._s_table = SymbolTable()
+        self._writer = None
+        self._class_name = None
+        self._subroutine = None
+        self._n_labels = 0
+
+    def generate(self, class_node, out_fname: str) -> None:
+        with VMWriter(out_fname) as writer:
+            self.write(class_node, writer)
+
+    def write(self, class_node, writer) -> None:
+        """
+        Writes the class through any VMWriter, such as a CommandWriter.
+        """
+        self._writer = writer
+        self._class_name = class_node.name
+        for var_dec in class_node.class_vars:
+            self._define(var_dec)
+        for subroutine in class_node.subroutines:
+            self._generate_subroutine(subroutine)
+
+    def _define(self, var_dec):
+        for name in var_dec.names:
+            self._s_table.define(name, var_dec.var_type, var_dec.kind)
+
+    def _generate_subroutine(self, subroutine):
+        self._subroutine = subroutine
+        self._s_table.start_subroutine(is_method=subroutine.kind == METHOD)
+        for var_dec in subroutine.parameters + subroutine.local_vars:
+            self._define(var_dec)
+
+        n_locals = self._s_table.var_count(SymbolTable.VAR)
+        qualified_name = ".".join([self._class_name, subroutine.name])
+        self._writer.write_function(qualified_name, n_locals)
+
+        if subroutine.kind == CONSTRUCTOR:
+            size = self._s_table.var_count(SymbolTable.FIELD)
+            self._writer.write_push("constant", size)
+            self._writer.write_call("Memory.alloc", 1)
+            self._writer.write_pop("pointer", 0)
+        elif subroutine.kind == METHOD:
+            self._writer.write_push("argument", 0)
+            self._writer.write_pop("pointer", 0)
+
+        self._generate_statements(subroutine.statements)
+        self._s_table.complete_subroutine()
+        self._subroutine = None
+
+    def _generate_statements(self, statements):
+        for statement in statements:
+            node_name = type(statement).__name__.lower()
+            getattr(self, f"_generate_{node_name}")(statement)
+
+    def _generate_let(self, node):
+        if node.index is not None:
+            self._generate_expression(node.index)
+            self._push_variable(node.name)
+            self._writer.write_add()
+            self._generate_expression(node.value)
+            self._writer.write_pop("temp", 0)
+            self._writer.write_pop("pointer", 1)
+            self._writer.write_push("temp", 0)
+            self._writer.write_pop("that", 0)
+        else:
+            self._generate_expression(node.value)
+            self._pop_variable(node.name)
+
+    def _generate_if(self, node):
+        false_label = self._allocate_label("IF_FALSE")
+        self._write_if_false(node.condition, false_label)
+
+        self._generate_statements(node.statements)
+        if node.else_statements is not None:
+            skip_else_label = self._allocate_label("SKIP_ELSE")
+            self._writer.write_goto(skip_else_label)
+            self._writer.write_label(false_label)
+            self._generate_statements(node.else_statements)
+            self._writer.write_label(skip_else_label)
+        else:
+            self._writer.write_label(false_label)
+
+    def _generate_while(self, node):
+        if self._optimize:
+            body_label = self._allocate_label("WHILE_BODY")
+            condition_label = self._allocate_label("WHILE_CONDITION")
+            self._writer.write_goto(condition_label)
+            self._writer.write_label(body_label)
+            self._generate_statements(node.statements)
+            self._writer.write_label(condition_label)
+            self._generate_expression(node.condition)
+            self._writer.write_if(body_label)
+            return
+
+        true_label = self._allocate_label("WHILE_TRUE")
+        self._writer.write_label(true_label)
+
+        self._generate_expression(node.condition)
+        self._writer.write_push("constant", 0)
+        self._writer.write_equals()
+        false_label = self._allocate_label("WHILE_FALSE")
+        self._writer.write_if(false_label)
+
+        self._generate_statements(node.statements)
+        self._writer.write_goto(true_label)
+        self._writer.write_label(false_label)
+
+    def _write_if_false(self, condition, label):
+        """
+        Writes the condition and a jump to label taken when it is false,
+        which is when it evaluates to 0.
+        """
+        if not self._optimize:
+            self._generate_expression(condition)
+            self._writer.write_push("constant", 0)
+            self._writer.write_equals()
+            self._writer.write_if(label)
+        elif (
+            isinstance(condition, UnaryOp)
+            and condition.op == "~"
+            and _is_boolean(condition.operand)
+        ):
+            # ~x is false exactly when x is true
+            self._generate_expression(condition.operand)
+            self._writer.write_if(label)
+        elif _is_boolean(condition):
+            self._generate_expression(condition)
+            self._writer.write_not()
+            self._writer.write_if(label)
+        else:
+            # any value but 0 is true, and not only inverts -1 into 0
+            true_label = self._allocate_label("IF_TRUE")
+            self._generate_expression(condition)
+            self._writer.write_if(true_label)
+            self._writer.write_goto(label)
+            self._writer.write_label(true_label)
+
+    def _generate_do(self, node):
+        self._generate_call(node.call)
+        self._writer.write_pop("temp", 0)
+
+    def _generate_return(self, node):
+        is_void = self._subroutine.return_type == VOID
+        if is_void and node.value is not None:
+            raise CompilationException(
+                f"Void function {self._subroutine.name} returns a value"
+            )
+        elif not is_void and node.value is None:
+            raise CompilationException(
+                f"Function {self._subroutine.name} must return a value"
+            )
+
+        if node.value is None:
+            self._writer.write_push("constant", 0)
+        elif node.value == KeywordConstant(THIS):
+            self._writer.write_push("pointer", 0)
+        else:
+            self._generate_expression(node.value)
+        self._writer.write_return()
+
+    def _generate_call(self, node):
+        is_method = True
+        if node.receiver is None:
+            # method call on this object
+            subroutine_name = ".".join([self._class_name, node.name])
+            self._writer.write_push("pointer", 0)
+        elif self._s_table.has(node.receiver):
+            # method call on another object
+            class_name = self._s_table.type_of(node.receiver)
+            subroutine_name = ".".join([class_name, node.name])
+            self._push_variable(node.receiver)
+        else:
+            # constructor or class function
+            is_method = False
+            subroutine_name = ".".join([node.receiver, node.name])
+
+        for arg in node.args:
+            self._generate_expression(arg)
+        n_args = len(node.args) + (1 if is_method else 0)
+        self._writer.write_call(subroutine_name, n_args)
+
+    def _generate_expression(self, node):
+        if isinstance(node, BinaryOp):
+            self._generate_expression(node.left)
+            if node.op == SHIFT_LEFT:
+                self._write_shift_left(node.right.value)
+            else:
+                self._generate_expression(node.right)
+                self._write_op(node.op)
+        elif isinstance(node, IntegerConstant):
+            if node.value < 0:
+                # folded constants may be negative, ~x is -x - 1
+                self._writer.write_push("constant", ~node.value)
+                self._writer.write_not()
+            else:
+                self._writer.write_push("constant", node.value)
+        elif isinstance(node, StringConstant):
+            if self._pool_strings:
+                self._write_pooled_string(node.value)
+            else:
+                self._write_string(node.value)
+        elif isinstance(node, KeywordConstant):
+            if node.value == TRUE:
+                self._writer.write_push("constant", 1)
+                self._writer.write_neg()
+            elif node.value in [FALSE, NULL]:
+                self._writer.write_push("constant", 0)
+            elif node.value == THIS:
+                self._writer.write_push("argument", 0)
+            else:
+                raise Exception(f"Bug: unexpected keyword {node.value}")
+        elif isinstance(node, UnaryOp):
+            self._generate_expression(node.operand)
+            if node.op == "-":
+                self._writer.write_neg()
+            elif node.op == "~":
+                self._writer.write_not()
+            else:
+                raise Exception(f"Bug: unexpected unary op {node.op}")
+        elif isinstance(node, ArrayRef):
+            self._generate_expression(node.index)
+            self._push_variable(node.name)
+            self._writer.write_add()
+            self._writer.write_pop("pointer", 1)
+            self._writer.write_push("that", 0)
+        elif isinstance(node, SubroutineCall):
+            self._generate_call(node)
+        elif isinstance(node, VarRef):
+            self._push_variable(node.name)
+        else:
+            raise Exception(f"Bug: unexpected node {node}")
+
+    def _write_string(self, value):
+        self._writer.write_push("constant", len(value))
+        self._writer.write_call("String.new", 1)
+        for char in value:
+            self._writer.write_push("constant", ord(char))
+            self._writer.write_call("String.appendChar", 2)
+
+    def _write_pooled_string(self, value):
+        """
+        Pushes the literal's String, building it into its static slot if
+        the slot still holds 0, as static memory does at power on.
+        """
+        if value not in self._string_slots:
+            n_statics = self._s_table.var_count(SymbolTable.STATIC)
+            self._string_slots[value] = n_statics + len(self._string_slots)
+        slot = self._string_slots[value]
+
+        ready_label = self._allocate_label("STRING_READY")
+        self._writer.write_push(STATIC, slot)
+        self._writer.write_if(ready_label)
+        self._write_string(value)
+        self._writer.write_pop(STATIC, slot)
+        self._writer.write_label(ready_label)
+        self._writer.write_push(STATIC, slot)
+
+    def _write_op(self, op):
+        if op == "+":
+            self._writer.write_add()
+        elif op == "-":
+            self._writer.write_sub()
+        elif op == "*":
+            self._writer.write_call("Math.multiply", 2)
+        elif op == "/":
+            self._writer.write_call("Math.divide", 2)
+        elif op == "&":
+            self._writer.write_and()
+        elif op == "|":
+            self._writer.write_or()
+        elif op == "<":
+            self._writer.write_less_than()
+        elif op == ">":
+            self._writer.write_greater_than()
+        elif op == "=":
+            self._writer.write_equals()
+        else:
+            raise Exception(f"Bug: no case for op {op}")
+
+    def _variable_kind(self, var_name):
+        if not self._s_table.has(var_name):
+            raise CompilationException(f"Unknown variable {var_name}")
+        return self._s_table.kind_of(var_name)
+
+    def _write_shift_left(self, n_bits):
+        """
+        Doubles the value on top of the stack n_bits times, through temp 1.
+        """
+        for _ in range(n_bits):
+            self._writer.write_pop("temp", 1)
+            self._writer.write_push("temp", 1)
+            self._writer.write_push("temp", 1)
+            self._writer.write_add()
+
+    def _push_variable(self, var_name):
+        kind = self._variable_kind(var_name)
+        idx = self._s_table.index_of(var_name)
+        self._writer.write_push(_SEGMENTS[kind], idx)
+
+    def _pop_variable(self, var_name):
+        kind = self._variable_kind(var_name)
+        idx = self._s_table.index_of(var_name)
+        self._writer.write_pop(_SEGMENTS[kind], idx)
+
+    def _allocate_label(self, label_name):
+        label = "{cls}.{func}${name}${id}".format(
+            cls=self._class_name,
+            func=self._subroutine.name,
+            name=label_name,
+            id=self._n_labels,
+        )
+        self._n_labels += 1
+        return label
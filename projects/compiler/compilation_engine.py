@@ -418,8 +418,9 @@ class CompilationEngine(object):
                 )
             return next_token
         else:
-            next_token = tknizer.next_token()
-            if next_token.value == "[":
+            lookahead = tknizer.peek()
+            if lookahead.value == "[":
+                tknizer.next_token()
                 _assert_identifier(token)
                 array_var_name = token.value
                 token = self._compile_expression(tknizer, tknizer.next_token())
@@ -429,8 +430,7 @@ class CompilationEngine(object):
                 self._writer.write_pop("pointer", 1)
                 self._writer.write_push("that", 0)
                 return tknizer.next_token()
-            elif next_token.value in ["(", "."]:
-                tknizer.rewind()
+            elif lookahead.value in ["(", "."]:
                 return self._compile_subroutine_call(tknizer, token)
             else:
                 _assert_identifier(token)
@@ -439,7 +439,7 @@ class CompilationEngine(object):
                         f"Unknown variable {token.value}"
                     )
                 self._push_variable(token.value)
-                return next_token
+                return tknizer.next_token()
 
     def _push_variable(self, var_name):
         idx = self._s_table.index_of(var_name)
@@ -0,0 +1,236 @@
+import argparse
+from glob import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from runner import compile_file
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_OS_DIR = os.path.join(os.path.dirname(_PROJECTS_DIR), "tools", "OS")
+_DEFAULT_PROGRAMS = [
+    os.path.join(_PROJECTS_DIR, project, "*") for project in ["09", "11"]
+]
+
+# compiler options compared by the benchmark, baseline first
+MODES = {
+    "baseline": {},
+    "optimize": {"optimize": True},
+    "pool-strings": {"pool_strings": True},
+}
+
+# the OS alone translates to more than the 32K word ROM without these
+TRANSLATOR_OPTIONS = {"optimize": True, "shared_calls": True}
+
+SCREEN = 16384
+KBD = 24576
+
+
+def build_rom(program_dir, build_dir, options):
+    """
+    Compiles the program's classes with the given options and translates
+    them together with the Jack OS into a ROM. Returns the ROM and the
+    address of every label.
+    """
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    # the program's own classes replace OS classes of the same name
+    for vm_fname in glob(os.path.join(_OS_DIR, "*.vm")):
+        shutil.copy(vm_fname, build_dir)
+    for jack_fname in glob(os.path.join(program_dir, "*.jack")):
+        jack_fname = shutil.copy(jack_fname, build_dir)
+        _, _, error = compile_file(jack_fname, **options)
+        if error:
+            raise ValueError(f"{jack_fname}: {error}")
+
+    asm_fname = os.path.join(build_dir, "Program.asm")
+    translator = import_tool("vm_translator", "runner")
+    translator.Runner(build_dir, **TRANSLATOR_OPTIONS).run(asm_fname)
+    rom = import_tool("assembler", "runner").Runner(asm_fname).assemble()
+    return rom, _label_addresses(asm_fname)
+
+
+def _label_addresses(asm_fname):
+    addresses = {}
+    pc = 0
+    with open(asm_fname, "r") as f:
+        for line in f:
+            code = line.partition("//")[0].strip()
+            if code.startswith("("):
+                addresses[code[1:-1]] = pc
+            elif code:
+                pc += 1
+    return addresses
+
+
+def run_program(
+    rom, labels, stop_label, n_stops, max_cycles, ram_values, ram_ranges
+):
+    """
+    Runs the ROM on the emulator from the entry of Main.main until it has
+    reached stop_label n_stops times, leaving out the OS initialization.
+    Returns the cycles executed since Main.main, whether the run reached its
+    last stop within max_cycles, and the contents of the screen and of the
+    given (start, end) RAM ranges.
+    """
+    cpu = import_tool("emulator", "jit").JitCPU(rom)
+    for addr, val in ram_values:
+        cpu.ram[addr] = val
+    cpu.run(cycles=max_cycles, until_pc=labels["Main.main"])
+    start = cpu.cycles
+    stopped = False
+    for _ in range(n_stops):
+        cpu.run(cycles=max_cycles - cpu.cycles, until_pc=labels[stop_label])
+        stopped = cpu.pc == labels[stop_label]
+        if not stopped:
+            break
+        cpu.run(cycles=1)
+
+    ram = [cpu.ram[first:last] for first, last in [(SCREEN, KBD)] + ram_ranges]
+    return cpu.cycles - start, stopped, ram
+
+
+def heap_requests(rom, labels, n_cycles, ram_values):
+    """
+    Replays the first n_cycles of a run from Main.main, returning the number
+    of Memory.alloc calls made and the words they requested.
+    """
+    cpu = import_tool("emulator", "jit").JitCPU(rom)
+    for addr, val in ram_values:
+        cpu.ram[addr] = val
+    cpu.run(until_pc=labels["Main.main"])
+    end = cpu.cycles + n_cycles
+    n_calls = 0
+    n_words = 0
+    while cpu.cycles < end:
+        cpu.run(cycles=end - cpu.cycles, until_pc=labels["Memory.alloc"])
+        if cpu.pc != labels["Memory.alloc"]:
+            break
+        # the size is argument 0 of the call being entered
+        n_calls += 1
+        n_words += cpu.ram[cpu.ram[2]]
+        cpu.run(cycles=1)
+
+    return n_calls, n_words
+
+
+def _reads_keyboard(program_dir):
+    for jack_fname in glob(os.path.join(program_dir, "*.jack")):
+        with open(jack_fname, "r") as f:
+            if "Keyboard." in f.read():
+                return True
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile Jack programs with each compiler mode, link them "
+        "with the Jack OS and count the cycles they run on the emulator from "
+        "Main.main. Programs run until Sys.halt, or for those reading the "
+        "keyboard, until they have polled it a number of times with no key "
+        "pressed."
+    )
+    parser.add_argument(
+        "programs",
+        nargs="*",
+        help="Directories of Jack programs. Defaults to projects 09 and 11.",
+    )
+    parser.add_argument(
+        "--polls",
+        type=int,
+        default=100,
+        help="Calls to Keyboard.keyPressed that end a program reading the "
+        "keyboard.",
+    )
+    parser.add_argument(
+        "--max-cycles",
+        type=int,
+        default=100000000,
+        help="Cycles after which a program is stopped.",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="ADDR=VAL",
+        help="Initialize a RAM word before running. May be repeated.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="append",
+        default=[],
+        metavar="START:END",
+        help="RAM range that must end up the same in every mode, as the "
+        "screen must. May be repeated.",
+    )
+    parser.add_argument(
+        "--heap",
+        action="store_true",
+        help="Also count the heap allocations of each run, by replaying it.",
+    )
+    args = parser.parse_args()
+    ram_values = [
+        tuple(int(x) for x in assignment.split("=")) for assignment in args.set
+    ]
+    ram_ranges = [
+        tuple(int(x) for x in ram_range.split(":"))
+        for ram_range in args.compare
+    ]
+    program_dirs = args.programs or sorted(
+        d
+        for pattern in _DEFAULT_PROGRAMS
+        for d in glob(pattern)
+        if glob(os.path.join(d, "*.jack"))
+    )
+
+    print(f"{'program':<20}" + "".join(f"{mode:>22}" for mode in MODES))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for program_dir in program_dirs:
+            if _reads_keyboard(program_dir):
+                stop_label, n_stops = "Keyboard.keyPressed", args.polls
+            else:
+                stop_label, n_stops = "Sys.halt", 1
+
+            results = []
+            heap = []
+            for options in MODES.values():
+                build_dir = os.path.join(tmp_dir, "build")
+                rom, labels = build_rom(program_dir, build_dir, options)
+                result = run_program(
+                    rom,
+                    labels,
+                    stop_label,
+                    n_stops,
+                    args.max_cycles,
+                    ram_values,
+                    ram_ranges,
+                )
+                results.append(result)
+                if args.heap:
+                    heap.append(
+                        heap_requests(rom, labels, result[0], ram_values)
+                    )
+
+            name = os.path.relpath(program_dir, _PROJECTS_DIR)
+            base_cycles = results[0][0]
+            cells = "".join(
+                f"{cycles:>12}{' ' if stopped else '+'}"
+                f"{cycles / base_cycles - 1:>+9.1%}"
+                for cycles, stopped, _ in results
+            )
+            print(f"{name:<20}{cells}")
+            if heap:
+                cells = "".join(
+                    f"{f'{n_calls} allocs {n_words} words':>22}"
+                    for n_calls, n_words in heap
+                )
+                print(f"{'':<20}{cells}")
+            if any(ram != results[0][2] for _, _, ram in results):
+                print(f"  RAM differs between modes for {name}")
+
+    print("+ stopped at --max-cycles")
@@ -0,0 +1,97 @@
+import argparse
+import filecmp
+from glob import glob
+import os
+import tempfile
+import tracemalloc
+
+from benchmark import _DEFAULT_INPUTS, _time_best_of
+from code_generator import CodeGenerator
+from compilation_engine import CompilationEngine
+from parser import Parser
+
+
+def compile_single_pass(jack_fname, out_fname):
+    CompilationEngine(jack_fname).compile(out_fname)
+
+
+def compile_with_tree(jack_fname, out_fname):
+    CodeGenerator().generate(Parser(jack_fname).parse(), out_fname)
+
+
+_ENGINES = {"single-pass": compile_single_pass, "tree": compile_with_tree}
+
+
+def peak_memory(compile_func, jack_fname, out_fname):
+    """
+    Returns the peak traced memory in bytes while compiling one class.
+    """
+    tracemalloc.start()
+    try:
+        compile_func(jack_fname, out_fname)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare end-to-end compile time and memory of the single "
+        "pass compilation engine and of the syntax tree parser and code "
+        "generator."
+    )
+    parser.add_argument(
+        "jack_files",
+        nargs="*",
+        help="Jack files to compile. Defaults to projects 09 to 11.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="Runs per engine, best kept."
+    )
+    args = parser.parse_args()
+    jack_fnames = args.jack_files or sorted(
+        f for pattern in _DEFAULT_INPUTS for f in glob(pattern)
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_fnames = {
+            name: [
+                os.path.join(tmp_dir, f"{name}.{idx}.vm")
+                for idx in range(len(jack_fnames))
+            ]
+            for name in _ENGINES
+        }
+
+        peaks = {}
+        for name, compile_func in _ENGINES.items():
+            peaks[name] = [
+                peak_memory(compile_func, jack_fname, out_fname)
+                for jack_fname, out_fname in zip(jack_fnames, out_fnames[name])
+            ]
+
+        for jack_fname, *outputs in zip(jack_fnames, *out_fnames.values()):
+            if not all(filecmp.cmp(outputs[0], f, False) for f in outputs):
+                print(f"Output mismatch for {jack_fname}")
+
+        seconds = _time_best_of(
+            [
+                lambda func=func, outs=outs: [
+                    func(jack_fname, out_fname)
+                    for jack_fname, out_fname in zip(jack_fnames, outs)
+                ]
+                for func, outs in zip(_ENGINES.values(), out_fnames.values())
+            ],
+            args.repeat,
+        )
+
+    n_bytes = sum(os.path.getsize(f) for f in jack_fnames)
+    print(f"{len(jack_fnames)} files, {n_bytes} bytes of source")
+    print(
+        f"{'engine':<14}{'seconds':>10}{'max peak KB':>14}"
+        f"{'sum peak KB':>14}"
+    )
+    for (name, engine_peaks), elapsed in zip(peaks.items(), seconds):
+        print(
+            f"{name:<14}{elapsed:>10.4f}{max(engine_peaks) / 1024:>14.1f}"
+            f"{sum(engine_peaks) / 1024:>14.1f}"
+        )
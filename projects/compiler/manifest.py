@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+
+MANIFEST_FNAME = ".jack_manifest.json"
+
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SOURCE_FILES = [
+    "code_generator.py",
+    "compilation_engine.py",
+    "optimizer.py",
+    "parser.py",
+    "symbol_table.py",
+    "syntax_tree.py",
+    "tokenizer.py",
+    "vm_writer.py",
+]
+
+
+def _compiler_version():
+    """
+    Hash of the compiler's own source, so editing it rebuilds everything.
+    """
+    sha = hashlib.sha1()
+    for fname in _SOURCE_FILES:
+        with open(os.path.join(_SOURCE_DIR, fname), "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+COMPILER_VERSION = _compiler_version()
+
+
+def file_hash(fname):
+    with open(fname, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class BuildManifest(object):
+    """
+    Records, for every class compiled in a directory, the hash of its source
+    and of the .vm file it compiled to. A class is up to date while its
+    source, the compiler, the compiler options and its .vm output are all
+    unchanged.
+
+    Jack classes compile independently of each other, so a class only
+    depends on its own source and the compiler.
+    """
+
+    def __init__(self, directory, options=None):
+        self._fname = os.path.join(directory, MANIFEST_FNAME)
+        self._options = options or {}
+        self._entries = {}
+        try:
+            with open(self._fname, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        if (
+            data.get("compiler_version") == COMPILER_VERSION
+            and data.get("options") == self._options
+        ):
+            self._entries = data.get("files", {})
+
+    def is_up_to_date(self, jack_fname, out_fname):
+        entry = self._entries.get(os.path.basename(jack_fname))
+        if entry is None or not os.path.exists(out_fname):
+            return False
+        return (
+            entry["source"] == file_hash(jack_fname)
+            and entry["output"] == file_hash(out_fname)
+        )
+
+    def record(self, jack_fname, out_fname):
+        self._entries[os.path.basename(jack_fname)] = {
+            "source": file_hash(jack_fname),
+            "output": file_hash(out_fname),
+        }
+
+    def forget(self, jack_fname):
+        self._entries.pop(os.path.basename(jack_fname), None)
+
+    def save(self):
+        data = {
+            "compiler_version": COMPILER_VERSION,
+            "options": self._options,
+            "files": self._entries,
+        }
+        tmp_fname = f"{self._fname}.{os.getpid()}.tmp"
+        with open(tmp_fname, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_fname, self._fname)
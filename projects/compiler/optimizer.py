@@ -0,0 +1,155 @@
+from syntax_tree import (
+    SHIFT_LEFT,
+    Let,
+    If,
+    While,
+    Do,
+    Return,
+    IntegerConstant,
+    KeywordConstant,
+    ArrayRef,
+    SubroutineCall,
+    UnaryOp,
+    BinaryOp,
+)
+from tokenizer import TRUE, FALSE, NULL
+
+
+def _wrap(val):
+    return ((val + 0x8000) & 0xFFFF) - 0x8000
+
+
+def _divide(x, y):
+    """
+    Integer division as the OS's Math.divide computes it, truncating towards
+    zero, or None where folding would hide its runtime error or overflow.
+    """
+    if y == 0 or -0x8000 in (x, y):
+        return None
+    quotient = abs(x) // abs(y)
+    return -quotient if (x < 0) != (y < 0) else quotient
+
+
+# evaluation of binary operators on 16 bit values, true being -1
+_BINARY_FOLDS = {
+    "+": lambda x, y: _wrap(x + y),
+    "-": lambda x, y: _wrap(x - y),
+    "*": lambda x, y: _wrap(x * y),
+    "/": _divide,
+    "&": lambda x, y: x & y,
+    "|": lambda x, y: x | y,
+    "<": lambda x, y: -(x < y),
+    ">": lambda x, y: -(x > y),
+    "=": lambda x, y: -(x == y),
+}
+_UNARY_FOLDS = {"-": lambda x: _wrap(-x), "~": lambda x: ~x}
+
+_KEYWORD_VALUES = {TRUE: -1, FALSE: 0, NULL: 0}
+
+
+def _constant_value(node):
+    if isinstance(node, IntegerConstant) and -0x8000 <= node.value < 0x8000:
+        return node.value
+    elif isinstance(node, KeywordConstant):
+        return _KEYWORD_VALUES.get(node.value)
+    return None
+
+
+def _log2(val):
+    """
+    Returns k for val == 2 ** k with k > 0, otherwise None.
+    """
+    if val is not None and val > 1 and not val & (val - 1):
+        return val.bit_length() - 1
+    return None
+
+
+class TreeOptimizer(object):
+    """
+    Rewrites the expressions of a class syntax tree before code generation:
+
+    - subexpressions of constants are folded into a single constant, with
+      the 16 bit arithmetic of the Hack platform, and true becomes the
+      constant -1
+    - multiplications by a power of two become a left shift, which the code
+      generator writes as repeated doubling instead of calling Math.multiply
+    - multiplications and divisions by 1 are dropped
+
+    Jack evaluates expressions from the left, so only subtrees whose every
+    operand is constant fold. Folding is skipped where the OS would report a
+    division by zero at runtime.
+    """
+
+    def __init__(self):
+        self.folded = 0
+        self.reduced = 0
+
+    def optimize(self, class_node):
+        for subroutine in class_node.subroutines:
+            self._optimize_statements(subroutine.statements)
+        return class_node
+
+    def _optimize_statements(self, statements):
+        for statement in statements:
+            if isinstance(statement, Let):
+                if statement.index is not None:
+                    statement.index = self._optimize_expression(statement.index)
+                statement.value = self._optimize_expression(statement.value)
+            elif isinstance(statement, (If, While)):
+                statement.condition = self._optimize_expression(
+                    statement.condition
+                )
+                self._optimize_statements(statement.statements)
+                if isinstance(statement, If) and statement.else_statements:
+                    self._optimize_statements(statement.else_statements)
+            elif isinstance(statement, Do):
+                self._optimize_expression(statement.call)
+            elif isinstance(statement, Return) and statement.value is not None:
+                statement.value = self._optimize_expression(statement.value)
+
+    def _optimize_expression(self, node):
+        if isinstance(node, BinaryOp):
+            return self._optimize_binary_op(node)
+        elif isinstance(node, UnaryOp):
+            node.operand = self._optimize_expression(node.operand)
+            operand = _constant_value(node.operand)
+            if operand is not None:
+                self.folded += 1
+                return IntegerConstant(_UNARY_FOLDS[node.op](operand))
+        elif isinstance(node, KeywordConstant) and node.value == TRUE:
+            return IntegerConstant(-1)
+        elif isinstance(node, ArrayRef):
+            node.index = self._optimize_expression(node.index)
+        elif isinstance(node, SubroutineCall):
+            node.args = [self._optimize_expression(arg) for arg in node.args]
+        return node
+
+    def _optimize_binary_op(self, node):
+        node.left = self._optimize_expression(node.left)
+        node.right = self._optimize_expression(node.right)
+        left = _constant_value(node.left)
+        right = _constant_value(node.right)
+
+        if left is not None and right is not None:
+            folded = _BINARY_FOLDS[node.op](left, right)
+            if folded is not None:
+                self.folded += 1
+                return IntegerConstant(folded)
+        elif node.op == "*":
+            if right == 1:
+                return node.left
+            elif left == 1:
+                return node.right
+
+            shift = _log2(right)
+            operand = node.left
+            if shift is None:
+                shift = _log2(left)
+                operand = node.right
+            if shift is not None:
+                self.reduced += 1
+                return BinaryOp(SHIFT_LEFT, operand, IntegerConstant(shift))
+        elif node.op == "/" and right == 1:
+            return node.left
+
+        return node
@@ -0,0 +1,339 @@
+from compilation_engine import (
+    CompilationException,
+    _assert,
+    _assert_identifier,
+    _assert_type,
+)
+from symbol_table import SymbolTable
+from syntax_tree import (
+    Class,
+    VarDec,
+    Subroutine,
+    Let,
+    If,
+    While,
+    Do,
+    Return,
+    IntegerConstant,
+    StringConstant,
+    KeywordConstant,
+    VarRef,
+    ArrayRef,
+    SubroutineCall,
+    UnaryOp,
+    BinaryOp,
+)
+from tokenizer import (
+    Tokenizer,
+    KEYWORD,
+    STRING_CONSTANT,
+    INT_CONSTANT,
+    IDENTIFIER,
+    TRUE,
+    FALSE,
+    NULL,
+    THIS,
+    CLASS,
+    STATIC,
+    FIELD,
+    METHOD,
+    FUNCTION,
+    CONSTRUCTOR,
+    INT,
+    BOOLEAN,
+    CHAR,
+    VAR,
+    LET,
+    DO,
+    IF,
+    ELSE,
+    WHILE,
+    RETURN,
+)
+
+
+BINARY_OPS = {"+", "-", "*", "/", "&", "|", "<", ">", "="}
+UNARY_OPS = {"-", "~"}
+
+
+class Parser(object):
+    """
+    Recursive descent parser building the syntax tree of one Jack class. It
+    follows the grammar CompilationEngine compiles in a single pass, and
+    leaves name resolution to the code generator.
+    """
+
+    def __init__(self, jack_fname):
+        self._jack_fname = jack_fname
+
+    def parse(self) -> Class:
+        tknizer = Tokenizer(self._jack_fname)
+        node, token = self._parse_class(tknizer, tknizer.next_token())
+        if token:
+            raise CompilationException(f"Expected end of file, found {token}")
+        return node
+
+    def _parse_class(self, tknizer, token):
+        _assert(token, CLASS)
+        token = tknizer.next_token()
+        _assert_identifier(token)
+        class_name = token.value
+        _assert(tknizer.next_token(), "{")
+
+        class_vars = []
+        token = tknizer.next_token()
+        while token.value in [STATIC, FIELD]:
+            var_dec, token = self._parse_class_var_dec(tknizer, token)
+            class_vars.append(var_dec)
+
+        subroutines = []
+        while token.value in [CONSTRUCTOR, FUNCTION, METHOD]:
+            subroutine, token = self._parse_subroutine_dec(tknizer, token)
+            subroutines.append(subroutine)
+
+        _assert(token, "}")
+        node = Class(class_name, class_vars, subroutines)
+        return node, tknizer.next_token()
+
+    def _parse_class_var_dec(self, tknizer, token):
+        _assert(token, [STATIC, FIELD])
+        if token.value == STATIC:
+            kind = SymbolTable.STATIC
+        else:
+            kind = SymbolTable.FIELD
+
+        token = tknizer.next_token()
+        _assert_type(token)
+        var_type = token.value
+        names, token = self._parse_names(tknizer)
+        _assert(token, ";")
+        return VarDec(kind, var_type, names), tknizer.next_token()
+
+    def _parse_subroutine_dec(self, tknizer, token):
+        _assert(token, [CONSTRUCTOR, FUNCTION, METHOD])
+        kind = token.value
+
+        token = tknizer.next_token()
+        _assert_type(token, allow_void=True)
+        return_type = token.value
+
+        token = tknizer.next_token()
+        _assert_identifier(token)
+        name = token.value
+
+        _assert(tknizer.next_token(), "(")
+        parameters, token = self._parse_parameter_list(
+            tknizer, tknizer.next_token()
+        )
+        _assert(token, ")")
+
+        _assert(tknizer.next_token(), "{")
+        local_vars = []
+        token = tknizer.next_token()
+        while token.value == VAR:
+            var_dec, token = self._parse_var_dec(tknizer, token)
+            local_vars.append(var_dec)
+
+        statements, token = self._parse_statements(tknizer, token)
+        _assert(token, "}")
+        node = Subroutine(
+            kind, return_type, name, parameters, local_vars, statements
+        )
+        return node, tknizer.next_token()
+
+    def _parse_parameter_list(self, tknizer, token):
+        parameters = []
+        if not (
+            token.value in [INT, CHAR, BOOLEAN] or token.type == IDENTIFIER
+        ):
+            return parameters, token
+
+        while True:
+            var_type = token.value
+            token = tknizer.next_token()
+            _assert_identifier(token)
+            parameters.append(VarDec(SymbolTable.ARG, var_type, [token.value]))
+            token = tknizer.next_token()
+            if token.value == ",":
+                token = tknizer.next_token()
+            else:
+                return parameters, token
+
+    def _parse_var_dec(self, tknizer, token):
+        _assert(token, VAR)
+        token = tknizer.next_token()
+        _assert_type(token)
+        var_type = token.value
+        names, token = self._parse_names(tknizer)
+        _assert(token, ";")
+        return VarDec(SymbolTable.VAR, var_type, names), tknizer.next_token()
+
+    def _parse_names(self, tknizer):
+        """
+        Parses a comma separated list of variable names.
+        """
+        names = []
+        while True:
+            token = tknizer.next_token()
+            _assert_identifier(token)
+            names.append(token.value)
+            token = tknizer.next_token()
+            if token.value != ",":
+                return names, token
+
+    def _parse_statements(self, tknizer, token):
+        statements = []
+        while token.value in [LET, IF, WHILE, DO, RETURN]:
+            method = getattr(self, f"_parse_{token.value}")
+            statement, token = method(tknizer, token)
+            statements.append(statement)
+
+        return statements, token
+
+    def _parse_let(self, tknizer, token):
+        _assert(token, LET)
+        token = tknizer.next_token()
+        _assert_identifier(token)
+        var_name = token.value
+
+        index = None
+        token = tknizer.next_token()
+        if token.value == "[":
+            index, token = self._parse_expression(
+                tknizer, tknizer.next_token()
+            )
+            _assert(token, "]")
+            token = tknizer.next_token()
+
+        _assert(token, "=")
+        value, token = self._parse_expression(tknizer, tknizer.next_token())
+        _assert(token, ";")
+        return Let(var_name, index, value), tknizer.next_token()
+
+    def _parse_if(self, tknizer, token):
+        _assert(token, IF)
+        condition, statements = self._parse_block(tknizer)
+
+        else_statements = None
+        token = tknizer.next_token()
+        if token.value == ELSE:
+            _assert(tknizer.next_token(), "{")
+            else_statements, token = self._parse_statements(
+                tknizer, tknizer.next_token()
+            )
+            _assert(token, "}")
+            token = tknizer.next_token()
+
+        return If(condition, statements, else_statements), token
+
+    def _parse_while(self, tknizer, token):
+        _assert(token, WHILE)
+        condition, statements = self._parse_block(tknizer)
+        return While(condition, statements), tknizer.next_token()
+
+    def _parse_block(self, tknizer):
+        """
+        Parses the parenthesized condition and the braced statements of an if
+        or while, up to the closing brace.
+        """
+        _assert(tknizer.next_token(), "(")
+        condition, token = self._parse_expression(
+            tknizer, tknizer.next_token()
+        )
+        _assert(token, ")")
+        _assert(tknizer.next_token(), "{")
+        statements, token = self._parse_statements(
+            tknizer, tknizer.next_token()
+        )
+        _assert(token, "}")
+        return condition, statements
+
+    def _parse_do(self, tknizer, token):
+        _assert(token, DO)
+        call, token = self._parse_subroutine_call(tknizer, tknizer.next_token())
+        _assert(token, ";")
+        return Do(call), tknizer.next_token()
+
+    def _parse_return(self, tknizer, token):
+        _assert(token, RETURN)
+        value = None
+        token = tknizer.next_token()
+        if token.value != ";":
+            value, token = self._parse_expression(tknizer, token)
+        _assert(token, ";")
+        return Return(value), tknizer.next_token()
+
+    def _parse_subroutine_call(self, tknizer, first_token):
+        _assert_identifier(first_token)
+
+        token = tknizer.next_token()
+        if token.value == ".":
+            token = tknizer.next_token()
+            _assert_identifier(token)
+            receiver = first_token.value
+            name = token.value
+            token = tknizer.next_token()
+        else:
+            receiver = None
+            name = first_token.value
+
+        _assert(token, "(")
+        args = []
+        token = tknizer.next_token()
+        if token.value != ")":
+            arg, token = self._parse_expression(tknizer, token)
+            args.append(arg)
+            while token.value == ",":
+                arg, token = self._parse_expression(
+                    tknizer, tknizer.next_token()
+                )
+                args.append(arg)
+
+        _assert(token, ")")
+        return SubroutineCall(receiver, name, args), tknizer.next_token()
+
+    def _parse_expression(self, tknizer, token):
+        """
+        Jack has no operator precedence, binary operators group from the left.
+        """
+        node, token = self._parse_term(tknizer, token)
+        while token.value in BINARY_OPS:
+            op = token.value
+            right, token = self._parse_term(tknizer, tknizer.next_token())
+            node = BinaryOp(op, node, right)
+
+        return node, token
+
+    def _parse_term(self, tknizer, token):
+        if token.type == INT_CONSTANT:
+            return IntegerConstant(int(token.value)), tknizer.next_token()
+        elif token.type == STRING_CONSTANT:
+            node = StringConstant(token.value[1:-1])
+            return node, tknizer.next_token()
+        elif token.type == KEYWORD and token.value in [TRUE, FALSE, NULL, THIS]:
+            return KeywordConstant(token.value), tknizer.next_token()
+        elif token.value == "(":
+            node, token = self._parse_expression(tknizer, tknizer.next_token())
+            _assert(token, ")")
+            return node, tknizer.next_token()
+        elif token.value in UNARY_OPS:
+            operand, next_token = self._parse_term(
+                tknizer, tknizer.next_token()
+            )
+            return UnaryOp(token.value, operand), next_token
+        else:
+            lookahead = tknizer.peek()
+            if lookahead.value == "[":
+                tknizer.next_token()
+                _assert_identifier(token)
+                array_var_name = token.value
+                index, token = self._parse_expression(
+                    tknizer, tknizer.next_token()
+                )
+                _assert(token, "]")
+                return ArrayRef(array_var_name, index), tknizer.next_token()
+            elif lookahead.value in ["(", "."]:
+                return self._parse_subroutine_call(tknizer, token)
+            else:
+                _assert_identifier(token)
+                return VarRef(token.value), tknizer.next_token()
@@ -1,19 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from glob import glob
 import os
+import time
 
+from code_generator import CodeGenerator
 from compilation_engine import CompilationEngine
+from manifest import BuildManifest
+from optimizer import TreeOptimizer
+from parser import Parser
+
+
+def output_fname_for(jack_fname):
+    return jack_fname[:-5] + ".vm"
+
+
+def compile_file(
+    jack_fname, single_pass=False, optimize=False, pool_strings=False
+):
+    """
+    Compiles one class into the .vm file next to it, returning (out_fname,
+    seconds, error). Errors are returned as text rather than raised so one
+    bad class does not abort the rest of the project.
+
+    The class is parsed into a syntax tree that CodeGenerator then writes
+    out, or compiled by CompilationEngine in a single pass when single_pass
+    is set. optimize runs TreeOptimizer on the tree in between, and has the
+    generator simplify branches. pool_strings has the generator build each
+    string literal once.
+    """
+    out_fname = output_fname_for(jack_fname)
+    start = time.perf_counter()
+    try:
+        if single_pass:
+            CompilationEngine(jack_fname).compile(out_fname)
+        else:
+            tree = Parser(jack_fname).parse()
+            if optimize:
+                tree = TreeOptimizer().optimize(tree)
+            generator = CodeGenerator(
+                optimize=optimize, pool_strings=pool_strings
+            )
+            generator.generate(tree, out_fname)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return out_fname, time.perf_counter() - start, error
 
 
 class Runner(object):
-    def __init__(self, input_fname):
+    def __init__(
+        self,
+        input_fname,
+        jobs=1,
+        force=False,
+        single_pass=False,
+        optimize=False,
+        pool_strings=False,
+    ):
+        if single_pass and (optimize or pool_strings):
+            raise ValueError(
+                "The single pass engine cannot optimize or pool strings"
+            )
+
         self._in_fname = input_fname
+        self._jobs = jobs
+        self._force = force
+        self._single_pass = single_pass
+        self._optimize = optimize
+        self._pool_strings = pool_strings
 
     def run(self):
+        """
+        Compiles every class whose .vm file is out of date according to the
+        directory's build manifest, or every class when forced, in a process
+        pool when jobs > 1. Each class compiles independently into its own
+        .vm file, and results are returned in file name order regardless of
+        completion order. Reused classes have None for their time.
+        """
         if os.path.isdir(self._in_fname):
-            jack_fnames = glob(os.path.join(self._in_fname, "*.jack"))
+            directory = self._in_fname
+            jack_fnames = sorted(glob(os.path.join(directory, "*.jack")))
         else:
+            directory = os.path.dirname(os.path.abspath(self._in_fname))
             jack_fnames = [self._in_fname]
 
+        manifest = BuildManifest(
+            directory,
+            {"optimize": self._optimize, "pool_strings": self._pool_strings},
+        )
+        results = {}
+        stale = []
         for jack_fname in jack_fnames:
-            out_fname = jack_fname[:-5] + ".vm"
-            CompilationEngine(jack_fname).compile(out_fname)
+            out_fname = output_fname_for(jack_fname)
+            if self._force or not manifest.is_up_to_date(
+                jack_fname, out_fname
+            ):
+                stale.append(jack_fname)
+            else:
+                results[jack_fname] = (out_fname, None, None)
+
+        compile_stale = partial(
+            compile_file,
+            single_pass=self._single_pass,
+            optimize=self._optimize,
+            pool_strings=self._pool_strings,
+        )
+        if self._jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+                compiled = list(executor.map(compile_stale, stale))
+        else:
+            compiled = list(map(compile_stale, stale))
+
+        for jack_fname, result in zip(stale, compiled):
+            results[jack_fname] = result
+            out_fname, _, error = result
+            if error:
+                manifest.forget(jack_fname)
+            else:
+                manifest.record(jack_fname, out_fname)
+        manifest.save()
+
+        return [(jack_fname, results[jack_fname]) for jack_fname in jack_fnames]
+
+    @staticmethod
+    def summarize(results, wall_time):
+        lines = []
+        errors = []
+        n_reused = 0
+        for in_fname, (out_fname, elapsed, error) in results:
+            if elapsed is None:
+                n_reused += 1
+                lines.append(f"{'reused':<8}{'':>11}  {in_fname}")
+                continue
+            status = "FAILED" if error else "ok"
+            lines.append(f"{status:<8}{elapsed * 1000:>9.1f}ms  {in_fname}")
+            if error:
+                errors.append(f"{in_fname}: {error}")
+
+        n_rebuilt = len(results) - n_reused
+        total = sum(elapsed or 0 for _, (_, elapsed, _) in results)
+        lines.append(
+            f"Compiled {n_rebuilt - len(errors)}/{n_rebuilt} files, reused "
+            f"{n_reused} in {wall_time * 1000:.1f}ms wall, "
+            f"{total * 1000:.1f}ms total"
+        )
+        if errors:
+            lines.append(f"{len(errors)} error(s):")
+            lines.extend(f"  {error}" for error in errors)
+
+        return "\n".join(lines), errors
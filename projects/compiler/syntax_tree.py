@@ -0,0 +1,173 @@
+"""
+Node classes of the Jack syntax tree built by parser.Parser and walked by
+code_generator.CodeGenerator. Nodes only hold the names and values found in
+the source; variables and calls are resolved against the symbol table during
+code generation.
+"""
+
+
+# binary operator introduced by optimizer.TreeOptimizer, not Jack syntax
+SHIFT_LEFT = "<<"
+
+
+class Node(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(repr(getattr(self, name)) for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+
+class Class(Node):
+    __slots__ = ("name", "class_vars", "subroutines")
+
+    def __init__(self, name, class_vars, subroutines):
+        self.name = name
+        self.class_vars = class_vars
+        self.subroutines = subroutines
+
+
+class VarDec(Node):
+    # kind is one of the SymbolTable kinds, a parameter is a VarDec of kind
+    # ARG with a single name
+    __slots__ = ("kind", "var_type", "names")
+
+    def __init__(self, kind, var_type, names):
+        self.kind = kind
+        self.var_type = var_type
+        self.names = names
+
+
+class Subroutine(Node):
+    __slots__ = (
+        "kind",
+        "return_type",
+        "name",
+        "parameters",
+        "local_vars",
+        "statements",
+    )
+
+    def __init__(
+        self, kind, return_type, name, parameters, local_vars, statements
+    ):
+        self.kind = kind
+        self.return_type = return_type
+        self.name = name
+        self.parameters = parameters
+        self.local_vars = local_vars
+        self.statements = statements
+
+
+class Let(Node):
+    # index is None unless an array element is assigned
+    __slots__ = ("name", "index", "value")
+
+    def __init__(self, name, index, value):
+        self.name = name
+        self.index = index
+        self.value = value
+
+
+class If(Node):
+    # else_statements is None without an else clause
+    __slots__ = ("condition", "statements", "else_statements")
+
+    def __init__(self, condition, statements, else_statements):
+        self.condition = condition
+        self.statements = statements
+        self.else_statements = else_statements
+
+
+class While(Node):
+    __slots__ = ("condition", "statements")
+
+    def __init__(self, condition, statements):
+        self.condition = condition
+        self.statements = statements
+
+
+class Do(Node):
+    __slots__ = ("call",)
+
+    def __init__(self, call):
+        self.call = call
+
+
+class Return(Node):
+    # value is None for a bare return
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class IntegerConstant(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class StringConstant(Node):
+    # value is the string without its quotes
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class KeywordConstant(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class VarRef(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class ArrayRef(Node):
+    __slots__ = ("name", "index")
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+
+class SubroutineCall(Node):
+    # receiver is the name before the dot, a variable or a class, and None
+    # for a method called on this
+    __slots__ = ("receiver", "name", "args")
+
+    def __init__(self, receiver, name, args):
+        self.receiver = receiver
+        self.name = name
+        self.args = args
+
+
+class UnaryOp(Node):
+    __slots__ = ("op", "operand")
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+
+class BinaryOp(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from tokenizer import SYMBOL, Tokenizer, TokenizerException
+
+
+class TokenizerTest(unittest.TestCase):
+    def _tokens(self, source):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jack_fname = os.path.join(tmp_dir, "Main.jack")
+            with open(jack_fname, "w") as f:
+                f.write(source)
+            tokenizer = Tokenizer(jack_fname)
+            tokens = []
+            while tokenizer.peek() is not None:
+                tokens.append(tokenizer.next_token())
+            return tokens
+
+    def test_division_and_comments(self):
+        tokens = self._tokens("let x = a / b; /* c */ // d\n/** e */ return;")
+        values = [token.value for token in tokens]
+        self.assertEqual(
+            values, ["let", "x", "=", "a", "/", "b", ";", "return", ";"]
+        )
+        self.assertEqual(tokens[4].type, SYMBOL)
+
+    def test_unterminated_block_comment(self):
+        with self.assertRaisesRegex(
+            TokenizerException,
+            r"Main\.jack:2:9: Unexpected unterminated comment",
+        ):
+            self._tokens("let x = 1;\nlet y = /* 2;\nreturn;")
+
+    def test_unterminated_string(self):
+        with self.assertRaisesRegex(
+            TokenizerException, "Unexpected unterminated string"
+        ):
+            self._tokens('let s = "abc;\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
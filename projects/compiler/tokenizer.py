@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import deque, namedtuple
 import re
 
 
@@ -56,7 +56,27 @@ INT_CONSTANT = "integerConstant"
 IDENTIFIER = "identifier"
 
 
-Token = namedtuple("Token", ["value", "type"])
+# line and column are 1-based positions of the token's first character
+Token = namedtuple(
+    "Token", ["value", "type", "line", "column"], defaults=[None, None]
+)
+
+# one compiled pattern matching the whitespace and comments before a token
+# and then the token itself, so the source is tokenized by a single finditer
+# scan with one match per token
+_TOKEN_RE = re.compile(
+    r"(?:\s+|//[^\n]*|/\*.*?\*/)*"
+    r"(?:(?P<{}>(?:{})\b)".format(KEYWORD, "|".join(sorted(KEYWORDS)))
+    + r"|(?P<{}>[a-zA-Z_][a-zA-Z_0-9]*)".format(IDENTIFIER)
+    # a / opening a comment that never closes is an error, not a symbol
+    + r"|(?P<{}>[{{}}()\[\].,;+\-*&|<>=~]|/(?!\*))".format(SYMBOL)
+    + r"|(?P<{}>[0-9]+)".format(INT_CONSTANT)
+    + r'|(?P<{}>"[^"\n]*")'.format(STRING_CONSTANT)
+    + r"|(?P<end>\Z)"
+    + r"|(?P<error>/\*|\"|.))",
+    re.DOTALL,
+)
+_TOKEN_TYPES = {KEYWORD, IDENTIFIER, SYMBOL, INT_CONSTANT, STRING_CONSTANT}
 
 
 class TokenizerException(Exception):
@@ -67,75 +87,64 @@ class Tokenizer(object):
     def __init__(self, jack_fname):
         self._jack_fname = jack_fname
         self._stream = self._token_stream()
-        self._tokens_so_far = []
-        self._rewind_ct = 0
+        # tokens read by peek and not yet returned by next_token, so memory
+        # use is bounded by the furthest lookahead rather than the file size
+        self._lookahead = deque()
 
     def next_token(self):
-        if self._rewind_ct > 0:
-            self._rewind_ct -= 1
-            return self._tokens_so_far[-(self._rewind_ct + 1)]
-
-        try:
-            token = next(self._stream)
-            self._tokens_so_far.append(token)
-            return token
-        except StopIteration:
-            return None
-
-    def rewind(self):
-        self._rewind_ct += 1
-
-        if self._rewind_ct > len(self._tokens_so_far):
-            raise TokenizerException("Cannot rewind any further.")
+        if self._lookahead:
+            return self._lookahead.popleft()
+        return next(self._stream, None)
+
+    def peek(self, k=1):
+        """
+        Returns the k-th token after the last one returned by next_token,
+        without consuming it, or None past the end of the file.
+        """
+        if k < 1:
+            raise TokenizerException(f"Cannot peek {k} tokens ahead.")
+
+        while len(self._lookahead) < k:
+            token = next(self._stream, None)
+            if token is None:
+                return None
+            self._lookahead.append(token)
+        return self._lookahead[k - 1]
 
     def _token_stream(self):
-        file_data = open(self._jack_fname, "r").read()
-        file_data = re.sub(r"\/\/.*\n", "", file_data)
-        block_regex = re.compile(r"\/\*\*(.|\s)*?\*\/", re.MULTILINE)
-        file_data = re.sub(block_regex, "", file_data)
-        course_tokens = re.split(r"\s+", file_data)
-
-        token = ""
-        in_str = False
-        for course_token in course_tokens:
-            if in_str:
-                token += " "
-            for char in course_token:
-                prev_char = token[-1] if token else None
-                if char == '"' and prev_char != "\\" and not in_str:
-                    token += char
-                    in_str = True
-                    continue
-                elif char == '"' and prev_char != "\\":
-                    token += char
-                    in_str = False
-                    yield Token(token, self._type_for(token))
-                    token = ""
-                    continue
-                elif in_str:
-                    token += char
-                    continue
-
-                if char in SYMBOLS:
-                    if token:
-                        yield Token(token, self._type_for(token))
-                        token = ""
-                    yield Token(char, SYMBOL)
-                else:
-                    token += char
-
-            if token and not in_str:
-                yield Token(token, self._type_for(token))
-                token = ""
-
-    def _type_for(self, token):
-        if token in KEYWORDS:
-            return KEYWORD
-        elif re.match(r'^"[^"]*"$', token):
-            return STRING_CONSTANT
-        elif re.match(r"^[0-9]+$", token):
-            return INT_CONSTANT
-        elif re.match(r"[a-zA-Z_]+[a-zA-Z_0-9]*", token):
-            return IDENTIFIER
-        else:
-            raise ValueError(f"Unable to identify token {token}")
+        with open(self._jack_fname, "r") as f:
+            source = f.read()
+
+        make_token = Token._make
+        token_types = _TOKEN_TYPES
+        line = 1
+        line_start = 0
+        pos = 0
+        for match in _TOKEN_RE.finditer(source):
+            kind = match.lastgroup
+            start = match.start(kind)
+            # newlines only occur in the whitespace and comments skipped
+            newlines = source.count("\n", pos, start)
+            if newlines:
+                line += newlines
+                line_start = source.rindex("\n", pos, start) + 1
+            pos = match.end()
+            column = start - line_start + 1
+
+            value = match.group(kind)
+            if kind not in token_types:
+                if kind == "end":
+                    return
+                raise TokenizerException(
+                    f"{self._jack_fname}:{line}:{column}: "
+                    f"Unexpected {self._describe(value)}"
+                )
+            yield make_token((value, kind, line, column))
+
+    @staticmethod
+    def _describe(value):
+        if value == "/*":
+            return "unterminated comment"
+        elif value == '"':
+            return "unterminated string"
+        return f'character "{value}"'
@@ -69,3 +69,71 @@ class VMWriter(object):
 
     def write_return(self) -> None:
         self._f.write(f"return\n")
+
+
+class CommandWriter(VMWriter):
+    """
+    VMWriter that keeps the commands in memory as token lists, the form the
+    VM translator's Parser.parse_commands takes, instead of writing text.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        pass
+
+    def write_push(self, segment: str, index: int) -> None:
+        self.commands.append(["push", segment, str(index)])
+
+    def write_pop(self, segment: str, index: int) -> None:
+        self.commands.append(["pop", segment, str(index)])
+
+    def write_add(self) -> None:
+        self.commands.append(["add"])
+
+    def write_sub(self) -> None:
+        self.commands.append(["sub"])
+
+    def write_neg(self) -> None:
+        self.commands.append(["neg"])
+
+    def write_equals(self) -> None:
+        self.commands.append(["eq"])
+
+    def write_greater_than(self) -> None:
+        self.commands.append(["gt"])
+
+    def write_less_than(self) -> None:
+        self.commands.append(["lt"])
+
+    def write_and(self) -> None:
+        self.commands.append(["and"])
+
+    def write_or(self) -> None:
+        self.commands.append(["or"])
+
+    def write_not(self) -> None:
+        self.commands.append(["not"])
+
+    def write_label(self, label: str) -> None:
+        self.commands.append(["label", label])
+
+    def write_goto(self, label: str) -> None:
+        self.commands.append(["goto", label])
+
+    def write_if(self, label: str) -> None:
+        self.commands.append(["if-goto", label])
+
+    def write_call(self, name: str, n_args: int) -> None:
+        self.commands.append(["call", name, str(n_args)])
+
+    def write_function(self, name: str, n_locals: int) -> None:
+        self.commands.append(["function", name, str(n_locals)])
+
+    def write_return(self) -> None:
+        self.commands.append(["return"])
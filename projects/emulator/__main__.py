@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import time
+
+from cpu import CPU
+from jit import JitCPU
+from rom import RomException, load_rom
+from script import TestScript, ScriptException
+from vm import VirtualMachine, VMException, vm_files
+
+
+def _parse_assignment(text):
+    addr, _, val = text.partition("=")
+    return int(addr), int(val)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a hack program, a VM program, or a CPU or VM "
+        "emulator test script."
+    )
+    parser.add_argument(
+        "input_file",
+        help="Program (.hack, .bin or .asm), VM program (.vm or a directory "
+        "of them) or test script (.tst).",
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        help="Maximum number of instructions, or VM commands, to run.",
+    )
+    parser.add_argument(
+        "--until-pc", type=int, help="Stop when PC reaches this."
+    )
+    parser.add_argument(
+        "--until-function",
+        help="Stop a VM program when it calls this function.",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="ADDR=VAL",
+        help="Initialize a RAM word before running. May be repeated.",
+    )
+    parser.add_argument(
+        "--print",
+        action="append",
+        type=int,
+        default=[],
+        metavar="ADDR",
+        help="RAM word to print after running. May be repeated.",
+    )
+    parser.add_argument(
+        "--jit",
+        action="store_true",
+        help="Compile the program into basic blocks instead of interpreting.",
+    )
+    parser.add_argument(
+        "--write-output",
+        action="store_true",
+        help="Write the test script's output file.",
+    )
+    args = parser.parse_args()
+    cpu_class = JitCPU if args.jit else CPU
+
+    if args.input_file.endswith(".tst"):
+        script = TestScript(args.input_file, cpu_class)
+        try:
+            lines = script.run(write_output=args.write_output)
+        except (ScriptException, RomException, VMException, OSError) as e:
+            if script.output_lines:
+                print("\n".join(script.output_lines))
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print("\n".join(lines))
+        print("End of script - Comparison ended successfully")
+        sys.exit(0)
+
+    is_vm = os.path.isdir(args.input_file) or args.input_file.endswith(".vm")
+    try:
+        if is_vm:
+            cpu = VirtualMachine(vm_files(args.input_file))
+            if "Sys.init" in cpu.functions:
+                cpu.boot()
+        else:
+            cpu = cpu_class(load_rom(args.input_file))
+    except (RomException, VMException, OSError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    for assignment in args.set:
+        addr, val = _parse_assignment(assignment)
+        cpu.ram[addr] = val
+
+    start = time.perf_counter()
+    if is_vm:
+        n = cpu.run(steps=args.cycles, until_function=args.until_function)
+    else:
+        n = cpu.run(cycles=args.cycles, until_pc=args.until_pc)
+    elapsed = time.perf_counter() - start
+
+    for addr in args.print:
+        print(f"RAM[{addr}] = {cpu.ram[addr]}")
+    print(
+        f"{n} {'commands' if is_vm else 'instructions'} in {elapsed:.3f}s"
+        f" ({n / max(elapsed, 1e-9):,.0f}/s), PC={cpu.pc}"
+        f"{', halted' if cpu.halted else ''}"
+    )
@@ -0,0 +1,57 @@
+import argparse
+from glob import glob
+import os
+import time
+
+from cpu import CPU
+from jit import JitCPU
+from rom import load_rom
+
+
+_DEFAULT_INPUTS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "06", "*", "*.hack"
+)
+
+
+def _bench(cpu_class, rom, cycles):
+    cpu = cpu_class(rom)
+    start = time.perf_counter()
+    n = cpu.run(cycles=cycles)
+    elapsed = time.perf_counter() - start
+    state = (bytes(cpu.ram), cpu.a, cpu.d, cpu.pc, cpu.halted)
+    return n, elapsed, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the interpreting and block-compiling emulators."
+    )
+    parser.add_argument(
+        "input_files",
+        nargs="*",
+        help="Programs to run. Defaults to the project 06 .hack files.",
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=5000000,
+        help="Maximum instructions to run per program.",
+    )
+    args = parser.parse_args()
+    fnames = args.input_files or sorted(glob(_DEFAULT_INPUTS))
+
+    print(
+        f"{'program':<20}{'cycles':>10}{'interpreter':>14}{'jit':>14}"
+        f"{'speedup':>9}"
+    )
+    for fname in fnames:
+        rom = load_rom(fname)
+        n, interp_time, interp_state = _bench(CPU, rom, args.cycles)
+        jit_n, jit_time, jit_state = _bench(JitCPU, rom, args.cycles)
+        if (n, interp_state) != (jit_n, jit_state):
+            raise AssertionError(f"State mismatch running {fname}")
+        print(
+            f"{os.path.basename(fname):<20}{n:>10}"
+            f"{n / interp_time:>12,.0f}/s{n / jit_time:>12,.0f}/s"
+            f"{interp_time / jit_time:>8.2f}x"
+        )
@@ -0,0 +1,160 @@
+from array import array
+
+
+RAM_SIZE = 1 << 15
+SCREEN = 16384
+KBD = 24576
+
+
+def _wrap(val):
+    return ((val + 0x8000) & 0xFFFF) - 0x8000
+
+
+# ALU computations keyed by the six c-bits, as functions of D and of the A
+# register or M, whichever the a-bit selects. Results stay within int16.
+_COMPUTATIONS = {
+    0b101010: lambda d, x: 0,
+    0b111111: lambda d, x: 1,
+    0b111010: lambda d, x: -1,
+    0b001100: lambda d, x: d,
+    0b110000: lambda d, x: x,
+    0b001101: lambda d, x: ~d,
+    0b110001: lambda d, x: ~x,
+    0b001111: lambda d, x: ((0x8000 - d) & 0xFFFF) - 0x8000,
+    0b110011: lambda d, x: ((0x8000 - x) & 0xFFFF) - 0x8000,
+    0b011111: lambda d, x: ((d + 0x8001) & 0xFFFF) - 0x8000,
+    0b110111: lambda d, x: ((x + 0x8001) & 0xFFFF) - 0x8000,
+    0b001110: lambda d, x: ((d + 0x7FFF) & 0xFFFF) - 0x8000,
+    0b110010: lambda d, x: ((x + 0x7FFF) & 0xFFFF) - 0x8000,
+    0b000010: lambda d, x: ((d + x + 0x8000) & 0xFFFF) - 0x8000,
+    0b010011: lambda d, x: ((d - x + 0x8000) & 0xFFFF) - 0x8000,
+    0b000111: lambda d, x: ((x - d + 0x8000) & 0xFFFF) - 0x8000,
+    0b000000: lambda d, x: d & x,
+    0b010101: lambda d, x: d | x,
+}
+
+
+def _alu_for(c_bits):
+    """
+    Builds the full ALU for c-bits outside the documented instruction set.
+    """
+    zx, nx, zy, ny, f, no = [(c_bits >> i) & 1 for i in range(5, -1, -1)]
+
+    def compute(d, x):
+        if zx:
+            d = 0
+        if nx:
+            d = ~d
+        if zy:
+            x = 0
+        if ny:
+            x = ~x
+        out = _wrap(d + x) if f else d & x
+        return ~out if no else out
+
+    return compute
+
+
+class EmulationException(Exception):
+    pass
+
+
+class CPU(object):
+    """
+    Hack computer: ROM, a 32K word RAM including the screen and keyboard
+    maps, and the A, D and PC registers.
+
+    ROM words are decoded once into tuples so that execution only has to
+    look up the precomputed ALU function, destinations and jump conditions.
+    """
+
+    def __init__(self, rom):
+        self.rom = array("H", rom)
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        self.cycles = 0
+        self.halted = False
+        self._ops = [
+            self._decode(pc, word) for pc, word in enumerate(self.rom)
+        ]
+
+    def _decode(self, pc, word):
+        if not word & 0x8000:
+            return None, word
+
+        c_bits = (word >> 6) & 0b111111
+        computation = _COMPUTATIONS.get(c_bits) or _alu_for(c_bits)
+        use_m = bool(word & 0x1000)
+        dest_a = bool(word & 0b100000)
+        dest_d = bool(word & 0b010000)
+        dest_m = bool(word & 0b001000)
+        # indexed by the sign of the ALU output: [zero, positive, negative]
+        jumps = (bool(word & 0b010), bool(word & 0b001), bool(word & 0b100))
+        if not any(jumps):
+            jumps = None
+
+        # "@pc-1; 0;JMP" spins forever, the usual way a Hack program halts
+        prev = self.rom[pc - 1] if pc else 0x8000
+        halts = (
+            jumps == (True, True, True)
+            and not (dest_a or dest_d or dest_m)
+            and not prev & 0x8000
+            and prev == pc - 1
+        )
+        return computation, use_m, dest_a, dest_d, dest_m, jumps, halts
+
+    def reset(self):
+        self.pc = 0
+        self.halted = False
+
+    def run(self, cycles=None, until_pc=None):
+        """
+        Executes until cycles instructions have run, the PC reaches until_pc,
+        or the program halts by jumping into an "@pc; 0;JMP" loop or leaving
+        the ROM. Returns the number of instructions executed.
+        """
+        ops = self._ops
+        ram = self.ram
+        a, d, pc = self.a, self.d, self.pc
+        limit = cycles if cycles is not None else -1
+        stop_pc = until_pc if until_pc is not None else -1
+        n_rom = len(ops)
+        n = 0
+        halted = False
+        try:
+            while n != limit and pc != stop_pc:
+                if pc >= n_rom:
+                    halted = True
+                    break
+                op = ops[pc]
+                n += 1
+                if op[0] is None:
+                    a = op[1]
+                    pc += 1
+                    continue
+
+                computation, use_m, dest_a, dest_d, dest_m, jumps, halts = op
+                val = computation(d, ram[a] if use_m else a)
+                if dest_m:
+                    ram[a] = val
+                if jumps and jumps[(val > 0) - (val < 0)]:
+                    pc = a & 0x7FFF
+                    if halts:
+                        halted = True
+                        break
+                else:
+                    pc += 1
+                if dest_a:
+                    a = val
+                if dest_d:
+                    d = val
+        except IndexError:
+            raise EmulationException(f"Address {a} out of range at PC {pc}")
+        finally:
+            self.a, self.d, self.pc = a, d, pc
+            self.cycles += n
+            self.halted = halted
+
+        return n
@@ -0,0 +1,221 @@
+from collections import OrderedDict
+import hashlib
+import sys
+
+from cpu import CPU, EmulationException, _alu_for
+
+
+ROM_SIZE = 1 << 15
+
+
+# ALU computations keyed by the six c-bits, as Python expressions over d and
+# x, where x is the A register or M. Results stay within int16.
+_EXPRESSIONS = {
+    0b101010: "0",
+    0b111111: "1",
+    0b111010: "-1",
+    0b001100: "d",
+    0b110000: "{x}",
+    0b001101: "~d",
+    0b110001: "~{x}",
+    0b001111: "((32768 - d) & 65535) - 32768",
+    0b110011: "((32768 - {x}) & 65535) - 32768",
+    0b011111: "((d + 32769) & 65535) - 32768",
+    0b110111: "(({x} + 32769) & 65535) - 32768",
+    0b001110: "((d + 32767) & 65535) - 32768",
+    0b110010: "(({x} + 32767) & 65535) - 32768",
+    0b000010: "((d + {x} + 32768) & 65535) - 32768",
+    0b010011: "((d - {x} + 32768) & 65535) - 32768",
+    0b000111: "(({x} - d + 32768) & 65535) - 32768",
+    0b000000: "d & {x}",
+    0b010101: "d | {x}",
+}
+
+# jump conditions keyed by the three j-bits (lt, eq, gt)
+_CONDITIONS = {
+    0b001: "v > 0",
+    0b010: "v == 0",
+    0b011: "v >= 0",
+    0b100: "v < 0",
+    0b101: "v != 0",
+    0b110: "v <= 0",
+    0b111: "True",
+}
+
+# compiled blocks shared by every JitCPU running the same ROM, for the most
+# recently loaded ROMs only so a process loading many does not keep them all
+_BLOCK_CACHE = OrderedDict()
+_BLOCK_CACHE_ROMS = 4
+
+
+class JitCPU(CPU):
+    """
+    CPU that compiles the ROM into basic blocks, each a generated Python
+    function running every instruction from an entry point up to and
+    including the next jump. Blocks are compiled on first entry and cached
+    by ROM hash for the last few ROMs loaded, and A register values known at
+    compile time become constant RAM indices.
+
+    Runs that would stop partway through a block (a cycle limit or until_pc
+    inside it) finish on the instruction-at-a-time interpreter, so results
+    are identical to CPU.
+    """
+
+    def __init__(self, rom):
+        super().__init__(rom)
+        rom_hash = hashlib.sha1(self.rom.tobytes()).hexdigest()
+        # indexed by every addressable PC so jumps past the ROM need no check
+        self._blocks = _BLOCK_CACHE.pop(rom_hash, None) or [None] * ROM_SIZE
+        _BLOCK_CACHE[rom_hash] = self._blocks
+        if len(_BLOCK_CACHE) > _BLOCK_CACHE_ROMS:
+            _BLOCK_CACHE.popitem(last=False)
+
+    def run(self, cycles=None, until_pc=None):
+        if until_pc is not None:
+            return self._run_until(cycles, until_pc)
+
+        blocks = self._blocks
+        ram = self.ram
+        a, d, pc = self.a, self.d, self.pc
+        limit = cycles if cycles is not None else sys.maxsize
+        n = 0
+        halted = False
+        try:
+            while True:
+                block = blocks[pc]
+                if block is None:
+                    block = blocks[pc] = self._compile_block(pc)
+                func, length = block
+                if n + length > limit:
+                    break
+                pc, a, d, halted = func(ram, a, d)
+                n += length
+                if halted:
+                    break
+        except IndexError:
+            raise EmulationException(f"Address {a} out of range in block {pc}")
+        finally:
+            self.a, self.d, self.pc = a, d, pc
+            self.cycles += n
+            self.halted = halted
+
+        if not halted and n < limit:
+            # the run ends inside the next block, step through the rest
+            n += CPU.run(self, cycles=limit - n)
+        return n
+
+    def _run_until(self, cycles, until_pc):
+        """
+        Runs whole blocks until one would pass until_pc or the cycle limit,
+        and then steps through that block one instruction at a time.
+        """
+        limit = cycles if cycles is not None else -1
+        n = 0
+        while n != limit and self.pc != until_pc and not self.halted:
+            block = self._blocks[self.pc]
+            if block is None:
+                block = self._blocks[self.pc] = self._compile_block(self.pc)
+            length = block[1]
+            remaining = limit - n if limit >= 0 else None
+            if (
+                remaining is not None and length > remaining
+            ) or self.pc < until_pc < self.pc + length:
+                steps = length if remaining is None else min(length, remaining)
+                n += CPU.run(self, cycles=steps, until_pc=until_pc)
+            else:
+                n += self.run(cycles=length)
+        return n
+
+    def _compile_block(self, entry):
+        """
+        Generates and compiles the function for the block starting at entry.
+        Returns the function and the number of instructions in the block.
+        """
+        lines = ["def block(ram, a, d):"]
+        if entry >= len(self.rom):
+            # running off the end of the program halts it
+            lines.append(f"    return {entry}, a, d, True")
+        # while A holds a value known at compile time it is used as a literal
+        # and only stored to the local a when the block exits
+        known_a = None
+        pc = entry
+        n_rom = len(self.rom)
+        env = {}
+        ended = False
+        while pc < n_rom and not ended:
+            word = self.rom[pc]
+            pc += 1
+            if not word & 0x8000:
+                known_a = word
+                continue
+
+            body, known_a, ended = self._compile_c(pc - 1, word, known_a, env)
+            lines.extend(body)
+
+        if not ended:
+            exit_a = "a" if known_a is None else str(known_a)
+            lines.append(f"    return {pc}, {exit_a}, d, False")
+        code = compile("\n".join(lines), f"<hack block {entry}>", "exec")
+        namespace = dict(env)
+        exec(code, namespace)
+        return namespace["block"], pc - entry
+
+    def _compile_c(self, pc, word, known_a, env):
+        """
+        Returns the lines for one C instruction, the compile-time value of A
+        after it, and whether it ends the block.
+        """
+        c_bits = (word >> 6) & 0b111111
+        use_m = word & 0x1000
+        dest_a = word & 0b100000
+        dest_d = word & 0b010000
+        dest_m = word & 0b001000
+        jmp_bits = word & 0b111
+
+        addr = "a" if known_a is None else str(known_a)
+        target = "a & 32767" if known_a is None else addr
+        operand = f"ram[{addr}]" if use_m else addr
+        if c_bits in _EXPRESSIONS:
+            expr = _EXPRESSIONS[c_bits].format(x=operand)
+        else:
+            alu_name = f"alu_{c_bits}"
+            env[alu_name] = _alu_for(c_bits)
+            expr = f"{alu_name}(d, {operand})"
+
+        lines = []
+        n_dests = bool(dest_a) + bool(dest_d) + bool(dest_m)
+        if jmp_bits == 0b111 and not n_dests:
+            # unconditional jump, the computation has no effect
+            halts = self._ops[pc][6]
+            lines.append(f"    return {target}, {addr}, d, {halts}")
+            return lines, known_a, True
+        elif not jmp_bits and n_dests == 1:
+            if dest_m:
+                lines.append(f"    ram[{addr}] = {expr}")
+            elif dest_d:
+                lines.append(f"    d = {expr}")
+            else:
+                lines.append(f"    a = {expr}")
+                known_a = None
+            return lines, known_a, False
+
+        lines.append(f"    v = {expr}")
+        if dest_m:
+            lines.append(f"    ram[{addr}] = v")
+        if dest_a and jmp_bits and known_a is None:
+            lines.append("    t = a")
+            target = "t & 32767"
+        if dest_a:
+            lines.append("    a = v")
+            known_a = None
+        if dest_d:
+            lines.append("    d = v")
+        if not jmp_bits:
+            return lines, known_a, False
+
+        halts = self._ops[pc][6]
+        exit_a = "a" if known_a is None else str(known_a)
+        lines.append(f"    if {_CONDITIONS[jmp_bits]}:")
+        lines.append(f"        return {target}, {exit_a}, d, {halts}")
+        lines.append(f"    return {pc + 1}, {exit_a}, d, False")
+        return lines, known_a, True
@@ -0,0 +1,54 @@
+from array import array
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+class RomException(Exception):
+    pass
+
+
+def _load_hack(fname):
+    rom = array("H")
+    with open(fname, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if len(line) != 16 or line.strip("01"):
+                raise RomException(
+                    f'{fname}:{line_no}: Invalid instruction "{line}"'
+                )
+            rom.append(int(line, 2))
+    return rom
+
+
+def _load_binary(fname):
+    rom = array("H")
+    with open(fname, "rb") as f:
+        rom.frombytes(f.read())
+    if sys.byteorder != "little":
+        rom.byteswap()
+    return rom
+
+
+def _load_asm(fname):
+    runner = import_tool("assembler", "runner")
+    return runner.Runner(fname).assemble()
+
+
+def load_rom(fname):
+    """
+    Loads a program as an array of 16 bit words from a .hack text file, a
+    packed little-endian .bin image, or an .asm file which is assembled.
+    """
+    if fname.endswith(".hack"):
+        return _load_hack(fname)
+    elif fname.endswith(".bin"):
+        return _load_binary(fname)
+    elif fname.endswith(".asm"):
+        return _load_asm(fname)
+    else:
+        raise RomException(f'Unknown ROM format for "{fname}"')
@@ -0,0 +1,259 @@
+import os
+import re
+
+from cpu import CPU
+from rom import load_rom
+from vm import VirtualMachine, vm_files
+
+
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_WORD_RE = re.compile(r"[{}]|[,;]|[^\s,;{}]+")
+_OUTPUT_SPEC_RE = re.compile(
+    r"(?P<name>[^%]+)(?:%(?P<fmt>[BDXS])(?P<l>\d+)\.(?P<m>\d+)\.(?P<r>\d+))?$"
+)
+_RAM_RE = re.compile(r"RAM\[(\d+)\]$")
+_SEGMENT_RE = re.compile(r"(local|argument|this|that|temp)\[(\d+)\]$")
+
+# VM emulator variables naming RAM words, and segment bases for _SEGMENT_RE
+_VM_REGISTERS = {"sp": 0, "local": 1, "argument": 2, "this": 3, "that": 4}
+
+
+class ScriptException(Exception):
+    pass
+
+
+class ComparisonException(ScriptException):
+    pass
+
+
+def _parse_value(text):
+    if text.startswith("%X"):
+        return int(text[2:], 16)
+    elif text.startswith("%B"):
+        return int(text[2:], 2)
+    elif text.startswith("%D"):
+        return int(text[2:])
+    return int(text)
+
+
+def _to_int16(val):
+    return ((val + 0x8000) & 0xFFFF) - 0x8000
+
+
+class _OutputColumn(object):
+    def __init__(self, spec):
+        match = _OUTPUT_SPEC_RE.match(spec)
+        if not match:
+            raise ScriptException(f'Bad output-list entry "{spec}"')
+        self.name = match.group("name")
+        self.fmt = match.group("fmt") or "D"
+        self.left = int(match.group("l") or 1)
+        self.width = int(match.group("m") or 6)
+        self.right = int(match.group("r") or 1)
+
+    def header(self):
+        total = self.left + self.width + self.right
+        name = self.name[:total]
+        pad = total - len(name)
+        return " " * (pad // 2) + name + " " * (pad - pad // 2)
+
+    def cell(self, val):
+        if self.fmt == "B":
+            text = f"{val & 0xFFFF:016b}"[-self.width :]
+        elif self.fmt == "X":
+            text = f"{val & 0xFFFF:04X}"[-self.width :]
+        else:
+            text = str(val)
+        return " " * self.left + text.rjust(self.width) + " " * self.right
+
+
+class TestScript(object):
+    """
+    Runs the subset of the CPU emulator's .tst language used by the course's
+    machine language and VM tests: load, output-file, compare-to,
+    output-list, set, repeat, ticktock and output.
+
+    VM emulator scripts, which load .vm files or a directory of them and
+    step with vmstep, run on a VirtualMachine instead, where sp, local,
+    argument, this and that and segment entries such as argument[1] may be
+    set and output.
+    """
+
+    def __init__(self, fname, cpu_class=CPU):
+        self._fname = fname
+        self._cpu_class = cpu_class
+        self._dir = os.path.dirname(os.path.abspath(fname))
+        self.cpu = None
+        self._columns = []
+        self._out_fname = None
+        self._cmp_lines = None
+        self.output_lines = []
+
+    def run(self, write_output=False):
+        with open(self._fname, "r") as f:
+            source = _COMMENT_RE.sub(" ", f.read())
+
+        words = _WORD_RE.findall(source)
+        commands, _ = self._parse_block(words, 0)
+        self._execute(commands)
+
+        if write_output and self._out_fname:
+            with open(self._out_fname, "w") as out_f:
+                out_f.write("".join(f"{line}\n" for line in self.output_lines))
+
+        return self.output_lines
+
+    def _parse_block(self, words, idx):
+        commands = []
+        command = []
+        while idx < len(words):
+            word = words[idx]
+            idx += 1
+            if word in [",", ";"]:
+                if command:
+                    commands.append(command)
+                command = []
+            elif word == "{":
+                if not command or command[0] != "repeat":
+                    raise ScriptException(f"Unsupported block: {command}")
+                body, idx = self._parse_block(words, idx)
+                count = int(command[1]) if len(command) > 1 else -1
+                commands.append(["repeat", count, body])
+                command = []
+            elif word == "}":
+                if command:
+                    commands.append(command)
+                return commands, idx
+            else:
+                command.append(word)
+
+        if command:
+            commands.append(command)
+        return commands, idx
+
+    def _execute(self, commands):
+        for command in commands:
+            name, args = command[0], command[1:]
+            if name == "repeat":
+                count, body = args
+                if count < 0:
+                    raise ScriptException("repeat requires a count")
+                if body == [["ticktock"]]:
+                    self._require_cpu().run(cycles=count)
+                elif body == [["vmstep"]]:
+                    self._require_cpu().run(steps=count)
+                else:
+                    for _ in range(count):
+                        self._execute(body)
+            elif name == "ticktock":
+                self._require_cpu().run(cycles=1)
+            elif name == "vmstep":
+                self._require_cpu().run(steps=1)
+            elif name == "load":
+                self._load(args)
+            elif name == "ROM32K":
+                # loads into a chip of a simulated Computer.hdl
+                raise ScriptException(f'Unsupported chip command "{name}"')
+            elif name == "output-file":
+                self._out_fname = os.path.join(self._dir, args[0])
+            elif name == "compare-to":
+                with open(os.path.join(self._dir, args[0]), "r") as f:
+                    self._cmp_lines = [line.rstrip("\r\n") for line in f]
+            elif name == "output-list":
+                self._columns = [_OutputColumn(spec) for spec in args]
+                self._emit("|" + "|".join(c.header() for c in self._columns))
+            elif name == "set":
+                self._set(*args)
+            elif name == "output":
+                cells = [c.cell(self._get(c.name)) for c in self._columns]
+                self._emit("|" + "|".join(cells))
+            elif name in ["echo", "clear-echo", "tick", "tock"]:
+                continue
+            else:
+                raise ScriptException(f'Unsupported script command "{name}"')
+
+    def _load(self, args):
+        # a bare load takes every .vm file of the script's directory
+        path = os.path.join(self._dir, args[0]) if args else self._dir
+        if path.endswith(".hdl"):
+            raise ScriptException(f'Unsupported chip load "{args[0]}"')
+        elif os.path.isdir(path) or path.endswith(".vm"):
+            self.cpu = VirtualMachine(vm_files(path))
+        else:
+            self.cpu = self._cpu_class(load_rom(path))
+
+    def _address(self, name):
+        """
+        Returns the RAM address a VM emulator variable names, or None.
+        """
+        if name in _VM_REGISTERS:
+            return _VM_REGISTERS[name]
+        match = _SEGMENT_RE.match(name)
+        if match is None:
+            return None
+        segment, index = match.group(1), int(match.group(2))
+        if segment == "temp":
+            return 5 + index
+        return self.cpu.ram[_VM_REGISTERS[segment]] + index
+
+    def _require_cpu(self):
+        if self.cpu is None:
+            raise ScriptException("No program loaded")
+        return self.cpu
+
+    def _set(self, name, value):
+        cpu = self._require_cpu()
+        val = _to_int16(_parse_value(value))
+        match = _RAM_RE.match(name)
+        address = self._address(name)
+        if match:
+            cpu.ram[int(match.group(1))] = val
+        elif address is not None:
+            cpu.ram[address] = val
+        elif name == "A":
+            cpu.a = val
+        elif name == "D":
+            cpu.d = val
+        elif name == "PC":
+            cpu.pc = val & 0xFFFF
+        else:
+            raise ScriptException(f'Unsupported variable "{name}"')
+
+    def _get(self, name):
+        cpu = self._require_cpu()
+        match = _RAM_RE.match(name)
+        address = self._address(name)
+        if match:
+            return cpu.ram[int(match.group(1))]
+        elif address is not None:
+            return cpu.ram[address]
+        elif name == "A":
+            return cpu.a
+        elif name == "D":
+            return cpu.d
+        elif name == "PC":
+            return cpu.pc
+        elif name == "time":
+            return cpu.cycles
+        else:
+            raise ScriptException(f'Unsupported variable "{name}"')
+
+    def _emit(self, line):
+        line += "|"
+        self.output_lines.append(line)
+        if self._cmp_lines is None:
+            return
+
+        line_no = len(self.output_lines)
+        expected = (
+            self._cmp_lines[line_no - 1]
+            if line_no <= len(self._cmp_lines)
+            else ""
+        )
+        if len(expected) != len(line) or any(
+            e != "*" and e != c for e, c in zip(expected, line)
+        ):
+            raise ComparisonException(
+                f"Comparison failure at line {line_no}: "
+                f'expected "{expected}", found "{line}"'
+            )
@@ -0,0 +1,363 @@
+from array import array
+from glob import glob
+import os
+import sys
+
+from cpu import RAM_SIZE
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+# opcodes, numbered roughly by how often compiled Jack code runs them so the
+# dispatch chain in VirtualMachine.run tests the common ones first
+PUSH_LOCAL = 0
+PUSH_CONSTANT = 1
+ADD = 2
+POP_RAM = 3
+IF_GOTO = 4
+PUSH_RAM = 5
+NOT = 6
+GOTO = 7
+POP_LOCAL = 8
+LT = 9
+SUB = 10
+GT = 11
+POP_THAT = 12
+PUSH_ARGUMENT = 13
+PUSH_THAT = 14
+CALL = 15
+FUNCTION = 16
+RETURN = 17
+AND = 18
+POP_ARGUMENT = 19
+EQ = 20
+OR = 21
+NEG = 22
+PUSH_THIS = 23
+POP_THIS = 24
+NATIVE = 25
+HALT = 26
+
+_ARITHMETIC = {
+    "add": ADD,
+    "sub": SUB,
+    "neg": NEG,
+    "eq": EQ,
+    "gt": GT,
+    "lt": LT,
+    "and": AND,
+    "or": OR,
+    "not": NOT,
+}
+_PUSH = {
+    "local": PUSH_LOCAL,
+    "argument": PUSH_ARGUMENT,
+    "this": PUSH_THIS,
+    "that": PUSH_THAT,
+}
+_POP = {
+    "local": POP_LOCAL,
+    "argument": POP_ARGUMENT,
+    "this": POP_THIS,
+    "that": POP_THAT,
+}
+# segments mapped to fixed RAM words, with their base address and size
+_FIXED_SEGMENTS = {"pointer": (3, 2), "temp": (5, 8)}
+
+STATIC_BASE = 16
+STACK_BASE = 256
+
+
+class VMException(Exception):
+    pass
+
+
+def vm_files(path):
+    """
+    Returns the .vm files of a program given as a file or a directory.
+    """
+    if os.path.isdir(path):
+        return sorted(glob(os.path.join(path, "*.vm")))
+    return [path]
+
+
+class VirtualMachine(object):
+    """
+    Runs VM programs directly, without translating them to Hack. The RAM is
+    laid out as on the Hack platform: SP, LCL, ARG, THIS and THAT in
+    RAM[0..4], temp at RAM[5..12], statics from RAM[16] in order of first
+    use, the stack from RAM[256], and the screen and keyboard maps.
+
+    Commands are decoded once into a flat list of int words, the opcode in
+    the low 5 bits and the operand above it, with labels and function names
+    resolved to command indices and segment accesses to an opcode per
+    segment, so running is a single loop dispatching on small ints. Labels
+    cost no step. Return addresses on the stack are command indices.
+
+    natives maps function names to Python functions run instead of their VM
+    code, or defining them if no .vm file does. They are called with the
+    function's arguments and return its 16 bit value.
+
+    While run is executing, SP, LCL and ARG are kept in local variables and
+    written back to RAM when it returns.
+    """
+
+    def __init__(self, vm_fnames, natives=None):
+        natives = natives or {}
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.steps = 0
+        self.halted = False
+        # entry index of every function and address of every static
+        self.functions = {}
+        self.statics = {}
+        self._natives = list(natives.values())
+        self._load(vm_fnames, list(natives))
+        self.pc = self.functions.get("Sys.init", 0)
+
+    def _load(self, vm_fnames, native_names):
+        parser = import_tool("vm_translator", "parser").Parser
+        commands = []
+        labels = {}
+        for vm_fname in vm_fnames:
+            class_name = os.path.splitext(os.path.basename(vm_fname))[0]
+            function = None
+            for tokens, _ in parser.parse_lines(vm_fname):
+                cmd = tokens[0]
+                if cmd == "function":
+                    function = tokens[1]
+                    if function in self.functions:
+                        raise VMException(f"Function {function} redefined")
+                    self.functions[function] = len(commands)
+                elif cmd == "label":
+                    labels[function, tokens[1]] = len(commands)
+                    continue
+                commands.append((class_name, function, tokens))
+
+        # natives replace the VM code of functions, or add missing ones
+        for name in native_names:
+            self.functions[name] = len(commands)
+            commands.append((None, name, None))
+
+        if len(commands) >= 0x8000:
+            raise VMException(
+                f"{len(commands)} commands do not fit 15 bit return addresses"
+            )
+
+        code = []
+        for class_name, function, tokens in commands:
+            if tokens is None:
+                code.append(native_names.index(function) << 5 | NATIVE)
+                continue
+            op, operand = self._decode(class_name, tokens)
+            if op in (GOTO, IF_GOTO, CALL):
+                if op == CALL:
+                    targets, key = self.functions, tokens[1]
+                else:
+                    targets, key = labels, (function, tokens[1])
+                if key not in targets:
+                    raise VMException(
+                        f'{class_name}: Unknown target in "{" ".join(tokens)}"'
+                    )
+                # a call keeps its argument count in the operand's low byte
+                operand |= targets[key] << 8 if op == CALL else targets[key]
+            code.append(operand << 5 | op)
+        # running off the end of the program halts it
+        code.append(HALT)
+        self._code = code
+
+    def _decode(self, class_name, tokens):
+        """
+        Returns the opcode and operand of a command, jump and call targets
+        being resolved by the caller.
+        """
+        cmd = tokens[0]
+        if cmd in _ARITHMETIC:
+            return _ARITHMETIC[cmd], 0
+        elif cmd == "goto":
+            return GOTO, 0
+        elif cmd == "if-goto":
+            return IF_GOTO, 0
+        elif cmd == "return":
+            return RETURN, 0
+
+        index = int(tokens[2])
+        if cmd == "call":
+            if not 0 <= index < 0x100:
+                raise VMException(f'{class_name}: Invalid "{" ".join(tokens)}"')
+            return CALL, index
+        elif cmd == "function":
+            return FUNCTION, index
+
+        segment = tokens[1]
+        if segment == "constant":
+            if cmd == "pop" or not 0 <= index < 0x8000:
+                raise VMException(f'{class_name}: Invalid "{" ".join(tokens)}"')
+            return PUSH_CONSTANT, index
+        elif segment in _PUSH:
+            return (_PUSH if cmd == "push" else _POP)[segment], index
+
+        if segment == "static":
+            key = (class_name, index)
+            address = self.statics.setdefault(
+                key, STATIC_BASE + len(self.statics)
+            )
+        elif segment in _FIXED_SEGMENTS and (
+            0 <= index < _FIXED_SEGMENTS[segment][1]
+        ):
+            address = _FIXED_SEGMENTS[segment][0] + index
+        else:
+            raise VMException(f'{class_name}: Invalid "{" ".join(tokens)}"')
+        return (PUSH_RAM if cmd == "push" else POP_RAM), address
+
+    def boot(self):
+        """
+        Starts the program the way the VM translator's bootstrap code does:
+        SP at 256 and a call to Sys.init, which returns to a halt.
+        """
+        if "Sys.init" not in self.functions:
+            raise VMException("The program has no Sys.init")
+        ram = self.ram
+        ram[STACK_BASE] = len(self._code) - 1
+        ram[0] = STACK_BASE + 5
+        ram[1] = STACK_BASE + 5
+        ram[2] = STACK_BASE
+        self.pc = self.functions["Sys.init"]
+        self.halted = False
+
+    def run(self, steps=None, until_function=None):
+        """
+        Executes until steps commands have run, a call is made to
+        until_function, or the program halts by returning from its first
+        function or running off its end. Returns the number of commands
+        executed. A run stopped by until_function leaves pc at the entry of
+        the called function, which the next run starts by executing.
+        """
+        code = self._code
+        natives = self._natives
+        ram = self.ram
+        pc = self.pc
+        sp, lcl, arg = ram[0], ram[1], ram[2]
+        limit = steps if steps is not None else -1
+        stop_at = -1
+        if until_function is not None:
+            stop_at = self.functions[until_function]
+        n = 0
+        try:
+            while n != limit:
+                word = code[pc]
+                op = word & 31
+                pc += 1
+                if op == PUSH_LOCAL:
+                    ram[sp] = ram[lcl + (word >> 5)]
+                    sp += 1
+                elif op == PUSH_CONSTANT:
+                    ram[sp] = word >> 5
+                    sp += 1
+                elif op == ADD:
+                    sp -= 1
+                    ram[sp - 1] = (
+                        (ram[sp - 1] + ram[sp] + 0x8000) & 0xFFFF
+                    ) - 0x8000
+                elif op == POP_RAM:
+                    sp -= 1
+                    ram[word >> 5] = ram[sp]
+                elif op == IF_GOTO:
+                    sp -= 1
+                    if ram[sp]:
+                        pc = word >> 5
+                elif op == PUSH_RAM:
+                    ram[sp] = ram[word >> 5]
+                    sp += 1
+                elif op == NOT:
+                    ram[sp - 1] = ~ram[sp - 1]
+                elif op == GOTO:
+                    pc = word >> 5
+                elif op == POP_LOCAL:
+                    sp -= 1
+                    ram[lcl + (word >> 5)] = ram[sp]
+                elif op == LT:
+                    sp -= 1
+                    ram[sp - 1] = -(ram[sp - 1] < ram[sp])
+                elif op == SUB:
+                    sp -= 1
+                    ram[sp - 1] = (
+                        (ram[sp - 1] - ram[sp] + 0x8000) & 0xFFFF
+                    ) - 0x8000
+                elif op == GT:
+                    sp -= 1
+                    ram[sp - 1] = -(ram[sp - 1] > ram[sp])
+                elif op == POP_THAT:
+                    sp -= 1
+                    ram[ram[4] + (word >> 5)] = ram[sp]
+                elif op == PUSH_ARGUMENT:
+                    ram[sp] = ram[arg + (word >> 5)]
+                    sp += 1
+                elif op == PUSH_THAT:
+                    ram[sp] = ram[ram[4] + (word >> 5)]
+                    sp += 1
+                elif op == CALL:
+                    ram[sp] = pc
+                    ram[sp + 1] = lcl
+                    ram[sp + 2] = arg
+                    ram[sp + 3] = ram[3]
+                    ram[sp + 4] = ram[4]
+                    arg = sp - ((word >> 5) & 0xFF)
+                    sp += 5
+                    lcl = sp
+                    pc = word >> 13
+                    if pc == stop_at:
+                        n += 1
+                        break
+                elif op == FUNCTION:
+                    for _ in range(word >> 5):
+                        ram[sp] = 0
+                        sp += 1
+                elif op == RETURN or op == NATIVE:
+                    if op == NATIVE:
+                        ram[sp] = natives[word >> 5](*ram[arg : lcl - 5])
+                        sp += 1
+                    # read before the return value may overwrite it
+                    pc = ram[lcl - 5]
+                    ram[arg] = ram[sp - 1]
+                    sp = arg + 1
+                    ram[4] = ram[lcl - 1]
+                    ram[3] = ram[lcl - 2]
+                    arg = ram[lcl - 3]
+                    lcl = ram[lcl - 4]
+                    if not 0 <= pc < len(code):
+                        pc = len(code) - 1
+                elif op == AND:
+                    sp -= 1
+                    ram[sp - 1] &= ram[sp]
+                elif op == POP_ARGUMENT:
+                    sp -= 1
+                    ram[arg + (word >> 5)] = ram[sp]
+                elif op == EQ:
+                    sp -= 1
+                    ram[sp - 1] = -(ram[sp - 1] == ram[sp])
+                elif op == OR:
+                    sp -= 1
+                    ram[sp - 1] |= ram[sp]
+                elif op == NEG:
+                    ram[sp - 1] = ((0x8000 - ram[sp - 1]) & 0xFFFF) - 0x8000
+                elif op == PUSH_THIS:
+                    ram[sp] = ram[ram[3] + (word >> 5)]
+                    sp += 1
+                elif op == POP_THIS:
+                    sp -= 1
+                    ram[ram[3] + (word >> 5)] = ram[sp]
+                else:
+                    # stay on the halt
+                    pc -= 1
+                    self.halted = True
+                    break
+                n += 1
+        except IndexError:
+            raise VMException(f"Address out of range at command {pc - 1}")
+        finally:
+            self.pc = pc
+            ram[0], ram[1], ram[2] = sp, lcl, arg
+            self.steps += n
+
+        return n
@@ -0,0 +1,143 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from cpu import KBD, SCREEN
+from jit import JitCPU
+from vm import VirtualMachine, vm_files
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+_PONG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "11", "Pong"
+)
+
+LEFT_ARROW = 130
+RIGHT_ARROW = 132
+
+
+def _pong_autopilot(instance_address):
+    """
+    Returns a function choosing the key to hold in a Pong frame so that the
+    bat follows the ball. Pong only reads a new direction after the key is
+    released, so switching direction takes a frame with no key.
+    """
+
+    def steer(ram):
+        game = ram[instance_address]
+        if not game:
+            return 0
+        # PongGame's first fields are bat and ball, Bat's are x, y, width
+        bat, ball = ram[game], ram[game + 1]
+        bat_center = ram[bat] + ram[bat + 2] // 2
+        key = LEFT_ARROW if ram[ball] < bat_center else RIGHT_ARROW
+        return key if ram[KBD] in (0, key) else 0
+
+    return steer
+
+
+def play(run_frame, ram, n_frames, steer):
+    """
+    Runs up to n_frames frames, each up to the next call to Sys.wait,
+    setting the keyboard before each one when given a steer function.
+    Returns the number of frames completed.
+    """
+    for frame in range(n_frames):
+        if steer is not None:
+            ram[KBD] = steer(ram)
+        if not run_frame():
+            return frame
+    return n_frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a Jack program headless on the VM interpreter with "
+        "the Jack OS for a number of frames, a frame ending with each call to "
+        "Sys.wait. Pong is steered by an autopilot keeping the bat under the "
+        "ball so the game goes on, other programs run with no key pressed."
+    )
+    parser.add_argument(
+        "program", nargs="?", default=_PONG_DIR, help="Jack program directory."
+    )
+    parser.add_argument(
+        "--frames", type=int, default=2000, help="Frames to run."
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=10000000,
+        help="Commands after which a frame is considered stuck.",
+    )
+    parser.add_argument(
+        "--real-wait",
+        action="store_true",
+        help="Interpret Sys.wait's busy loop instead of returning at once.",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Also run the translated program on the Hack emulator with the "
+        "same input and compare the screens.",
+    )
+    args = parser.parse_args()
+    natives = {} if args.real_wait else {"Sys.wait": lambda duration: 0}
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        build = import_tool("compiler", "cycle_benchmark")
+        rom, labels = build.build_rom(args.program, build_dir, {})
+
+        start = time.perf_counter()
+        machine = VirtualMachine(vm_files(build_dir), natives)
+        load_time = time.perf_counter() - start
+
+    steer = None
+    if ("PongGame", 0) in machine.statics:
+        steer = _pong_autopilot(machine.statics["PongGame", 0])
+
+    def run_vm_frame():
+        machine.run(steps=args.max_steps, until_function="Sys.wait")
+        return machine.pc == machine.functions["Sys.wait"]
+
+    machine.boot()
+    start = time.perf_counter()
+    machine.run(until_function="Main.main")
+    init_time = time.perf_counter() - start
+    init_steps = machine.steps
+
+    start = time.perf_counter()
+    n_frames = play(run_vm_frame, machine.ram, args.frames, steer)
+    elapsed = time.perf_counter() - start
+    n_steps = machine.steps - init_steps
+
+    print(f"{len(machine.functions)} functions loaded in {load_time:.3f}s")
+    print(f"OS init: {init_steps} steps in {init_time:.3f}s")
+    print(
+        f"{n_frames} frames, {n_steps} steps in {elapsed:.3f}s: "
+        f"{n_frames / elapsed:,.1f} frames/s, {n_steps / elapsed:,.0f} steps/s"
+    )
+
+    if args.check:
+        cpu = JitCPU(rom)
+        cpu.run(until_pc=labels["Main.main"])
+        wait_pc = labels["Sys.wait"]
+
+        def run_cpu_frame():
+            # step off the entry of the previous frame's Sys.wait
+            if cpu.pc == wait_pc:
+                cpu.run(cycles=1)
+            cpu.run(cycles=args.max_steps * 100, until_pc=wait_pc)
+            return cpu.pc == wait_pc
+
+        cpu_frames = play(run_cpu_frame, cpu.ram, n_frames, steer)
+        same = cpu_frames == n_frames and (
+            cpu.ram[SCREEN:KBD] == machine.ram[SCREEN:KBD]
+        )
+        print(
+            f"Hack emulator: {cpu_frames} frames, screen "
+            f"{'matches' if same else 'DIFFERS'}"
+        )
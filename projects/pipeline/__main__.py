@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+import time
+
+from pipeline import BuildException, Pipeline, import_tool
+
+encoder = import_tool("assembler", "encoder")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build Jack classes and VM files into a Hack program in "
+        "one process, without writing the intermediate .vm and .asm files."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help=".jack files, .vm files or directories of them. A class found "
+        "in several inputs is taken from the first, so list the program "
+        "before the OS to replace OS classes.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output file. Defaults to the first input's name with the "
+        "output format as extension, .hack or .bin.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=encoder.OUTPUT_FORMATS,
+        default=encoder.HACK_FORMAT,
+        help="Write text .hack output or a packed little-endian binary ROM.",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Optimize in the compiler and in the VM translator.",
+    )
+    parser.add_argument(
+        "--pool-strings",
+        action="store_true",
+        help="Build each string literal once and reuse it afterwards.",
+    )
+    parser.add_argument(
+        "--shared-calls",
+        action="store_true",
+        help="Translate calls and returns into jumps to shared routines.",
+    )
+    parser.add_argument(
+        "--shared-comparisons",
+        action="store_true",
+        help="Translate eq, gt and lt into jumps to shared routines.",
+    )
+    parser.add_argument(
+        "--fuse",
+        action="store_true",
+        help="Translate common sequences of VM commands as superinstructions.",
+    )
+    parser.add_argument(
+        "--tos-in-d",
+        action="store_true",
+        help="Keep the top of the stack in D within basic blocks.",
+    )
+    parser.add_argument(
+        "--dump-dir",
+        help="Also write the VM code of every class and the assembly of the "
+        "program to this directory.",
+    )
+    args = parser.parse_args()
+    out_fname = args.output
+    if out_fname is None:
+        first = args.inputs[0].rstrip("/")
+        if os.path.isdir(first):
+            out_base = os.path.join(first, os.path.basename(first))
+        else:
+            out_base = os.path.splitext(first)[0]
+        out_fname = f"{out_base}.{args.format}"
+
+    start = time.perf_counter()
+    pipeline = Pipeline(
+        args.inputs,
+        optimize=args.optimize,
+        pool_strings=args.pool_strings,
+        shared_calls=args.shared_calls,
+        shared_comparisons=args.shared_comparisons,
+        fuse=args.fuse,
+        tos_in_d=args.tos_in_d,
+        dump_dir=args.dump_dir,
+    )
+    try:
+        words = pipeline.build()
+    except BuildException as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    if args.format == encoder.HACK_FORMAT:
+        with open(out_fname, "w") as out_f:
+            out_f.write(encoder.Encoder.to_hack_text(words))
+    else:
+        with open(out_fname, "wb") as out_f:
+            out_f.write(encoder.Encoder.to_binary(words))
+    elapsed = time.perf_counter() - start
+    stages = ", ".join(
+        f"{stage} {seconds:.3f}s" for stage, seconds in pipeline.timings.items()
+    )
+    print(f"{out_fname}: {len(words)} words in {elapsed:.3f}s ({stages})")
@@ -0,0 +1,184 @@
+import argparse
+import filecmp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pipeline import Pipeline, find_sources, import_tool
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_INPUTS = [
+    os.path.join(_PROJECTS_DIR, "11", "Pong"),
+    os.path.join(os.path.dirname(_PROJECTS_DIR), "tools", "OS"),
+]
+
+
+def stage_sources(input_paths, build_dir):
+    """
+    Copies the sources the pipeline would pick from the inputs into a
+    single directory, for the builds that go through files.
+    """
+    os.makedirs(build_dir)
+    for fname in find_sources(input_paths).values():
+        shutil.copy(fname, build_dir)
+
+
+def _flags(options, tool):
+    # the compiler has no shared routine or stack code options, the
+    # translator no pooling
+    skipped = "pool_strings"
+    if tool == "compiler":
+        skipped = ("shared_", "fuse", "tos_in_d")
+    return [
+        f"--{name.replace('_', '-')}"
+        for name in options
+        if not name.startswith(skipped)
+    ]
+
+
+def build_with_tools(build_dir, options):
+    """
+    Runs the compiler, VM translator and assembler command line tools one
+    after the other, as a build script would. Returns the .hack file.
+    """
+    name = os.path.basename(build_dir)
+    asm_fname = os.path.join(build_dir, f"{name}.asm")
+    for tool, args in [
+        ("compiler", ["--force", *_flags(options, "compiler"), build_dir]),
+        ("vm_translator", [*_flags(options, "vm_translator"), build_dir]),
+        ("assembler", [asm_fname]),
+    ]:
+        subprocess.run(
+            [sys.executable, os.path.join(_PROJECTS_DIR, tool), *args],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    return os.path.join(build_dir, f"{name}.hack")
+
+
+def build_with_files(build_dir, options):
+    """
+    Runs the same three stages in this process, each reading its input from
+    and writing its output to files. Returns the .hack file.
+    """
+    compiler = import_tool("compiler", "runner")
+    compile_options = {
+        name: options.get(name, False) for name in ["optimize", "pool_strings"]
+    }
+    for fname in sorted(os.listdir(build_dir)):
+        if fname.endswith(".jack"):
+            jack_fname = os.path.join(build_dir, fname)
+            _, _, error = compiler.compile_file(jack_fname, **compile_options)
+            if error:
+                raise ValueError(f"{jack_fname}: {error}")
+
+    name = os.path.basename(build_dir)
+    asm_fname = os.path.join(build_dir, f"{name}.asm")
+    hack_fname = os.path.join(build_dir, f"{name}.hack")
+    translator_options = {
+        name: val for name, val in options.items() if name != "pool_strings"
+    }
+    translator = import_tool("vm_translator", "runner")
+    translator.Runner(build_dir, **translator_options).run(asm_fname)
+    import_tool("assembler", "runner").Runner(asm_fname).run(hack_fname)
+    return hack_fname
+
+
+def _time_best_of(builds, repeat):
+    """
+    Returns the best time of each build, alternating between them so they
+    all run under the same machine load.
+    """
+    best = [None] * len(builds)
+    for _ in range(repeat):
+        for idx, build in enumerate(builds):
+            start = time.perf_counter()
+            build()
+            elapsed = time.perf_counter() - start
+            if best[idx] is None or elapsed < best[idx]:
+                best[idx] = elapsed
+    return best
+
+
+def build_in_memory(input_paths, hack_fname, options):
+    """
+    Builds with the in-memory pipeline, writing only the .hack file.
+    """
+    words = Pipeline(input_paths, **options).build()
+    encoder = import_tool("assembler", "encoder").Encoder
+    with open(hack_fname, "w") as out_f:
+        out_f.write(encoder.to_hack_text(words))
+    return hack_fname
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the wall-clock time of building a Jack program "
+        "with the three command line tools, with the same stages run in one "
+        "process through intermediate files, and with the in-memory "
+        "pipeline. Every build must produce the same ROM."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Inputs as the pipeline takes them. Defaults to 11/Pong with "
+        "the Jack OS.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per build, best kept."
+    )
+    for flag in [
+        "--optimize",
+        "--pool-strings",
+        "--shared-calls",
+        "--shared-comparisons",
+        "--fuse",
+        "--tos-in-d",
+    ]:
+        parser.add_argument(flag, action="store_true", help="Build option.")
+    args = parser.parse_args()
+    input_paths = args.inputs or _DEFAULT_INPUTS
+    options = {
+        name: True
+        for name in [
+            "optimize",
+            "pool_strings",
+            "shared_calls",
+            "shared_comparisons",
+            "fuse",
+            "tos_in_d",
+        ]
+        if getattr(args, name)
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tools_dir = os.path.join(tmp_dir, "tools")
+        files_dir = os.path.join(tmp_dir, "files")
+        stage_sources(input_paths, tools_dir)
+        stage_sources(input_paths, files_dir)
+        memory_hack = os.path.join(tmp_dir, "memory.hack")
+        builds = {
+            "tools": lambda: build_with_tools(tools_dir, options),
+            "files": lambda: build_with_files(files_dir, options),
+            "memory": lambda: build_in_memory(
+                input_paths, memory_hack, options
+            ),
+        }
+
+        hack_fnames = [build() for build in builds.values()]
+        for name, hack_fname in zip(builds, hack_fnames):
+            if not filecmp.cmp(hack_fnames[-1], hack_fname, False):
+                print(f"ROM mismatch between {name} and memory builds")
+        n_words = os.path.getsize(memory_hack) // 17
+
+        seconds = _time_best_of(list(builds.values()), args.repeat)
+
+    n_sources = len(find_sources(input_paths))
+    print(f"{n_sources} classes, {n_words} ROM words")
+    print(f"{'build':<10}{'seconds':>10}{'vs tools':>10}")
+    for name, elapsed in zip(builds, seconds):
+        print(f"{name:<10}{elapsed:>10.4f}{elapsed / seconds[0] - 1:>+10.1%}")
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+class BuildException(Exception):
+    pass
+
+
+def find_sources(input_paths):
+    """
+    Returns {class_name: fname} for the .jack and .vm files of the inputs,
+    each a file or a directory. A class found in several inputs comes from
+    the first, and within a directory its .jack source wins over a .vm file.
+    """
+    sources = {}
+    for path in input_paths:
+        if os.path.isdir(path):
+            fnames = sorted(
+                os.path.join(path, fname)
+                for fname in os.listdir(path)
+                if fname.endswith((".jack", ".vm"))
+            )
+            # .jack sorts before .vm for the same class
+            fnames.sort(key=lambda f: os.path.splitext(f)[1] == ".vm")
+        elif path.endswith((".jack", ".vm")):
+            fnames = [path]
+        else:
+            raise BuildException(f'"{path}" is not a .jack or .vm file')
+
+        found = {}
+        for fname in fnames:
+            class_name = os.path.splitext(os.path.basename(fname))[0]
+            found.setdefault(class_name, fname)
+        for class_name, fname in found.items():
+            sources.setdefault(class_name, fname)
+
+    return sources
+
+
+class Pipeline(object):
+    """
+    Builds Jack classes and VM files into Hack machine code in one process.
+    The stages hand each other structured data instead of text files:
+
+    - the compiler writes each class's VM commands into a CommandWriter as
+      token lists
+    - the VM translator encodes the token lists of all classes into
+      assembly lines
+    - the assembler tokenizes those lines and encodes them into ROM words
+
+    The ROM is the same as compiling, translating and assembling through
+    files gives, with classes translated in file name order. Intermediate
+    .vm and .asm files are only written when a dump directory is given.
+    """
+
+    def __init__(
+        self,
+        input_paths,
+        optimize=False,
+        pool_strings=False,
+        shared_calls=False,
+        shared_comparisons=False,
+        fuse=False,
+        tos_in_d=False,
+        dump_dir=None,
+    ):
+        self._input_paths = input_paths
+        self._optimize = optimize
+        self._pool_strings = pool_strings
+        self._translator_options = {
+            "optimize": optimize,
+            "shared_calls": shared_calls,
+            "shared_comparisons": shared_comparisons,
+            "fuse": fuse,
+            "tos_in_d": tos_in_d,
+        }
+        self._dump_dir = dump_dir
+        # seconds spent in each stage by the last build
+        self.timings = {}
+
+    def build(self):
+        """
+        Returns the program as an array of 16 bit instruction words.
+        """
+        sources = find_sources(self._input_paths)
+        if not sources:
+            raise BuildException("No .jack or .vm files to build")
+
+        start = time.perf_counter()
+        units = [
+            (class_name, self._commands_for(sources[class_name]))
+            for class_name in sorted(sources, key=lambda name: f"{name}.vm")
+        ]
+        compiled = time.perf_counter()
+
+        translator = import_tool("vm_translator", "runner")
+        runner = translator.Runner(None, **self._translator_options)
+        asm_lines = list(runner.translate_units(units))
+        translated = time.perf_counter()
+
+        assembler = import_tool("assembler", "runner")
+        asm_parser = import_tool("assembler", "parser").Parser
+        words = assembler.Runner.assemble_tokens(
+            asm_parser.tokenize_lines(code for code, _ in asm_lines)
+        )
+        assembled = time.perf_counter()
+
+        self.timings = {
+            "compile": compiled - start,
+            "translate": translated - compiled,
+            "assemble": assembled - translated,
+        }
+        if self._dump_dir is not None:
+            self._dump(units, asm_lines)
+        return words
+
+    def _commands_for(self, fname):
+        if fname.endswith(".vm"):
+            vm_parser = import_tool("vm_translator", "parser").Parser
+            return [tokens for tokens, _ in vm_parser.parse_lines(fname)]
+
+        parser = import_tool("compiler", "parser")
+        writer = import_tool("compiler", "vm_writer").CommandWriter()
+        try:
+            tree = parser.Parser(fname).parse()
+            if self._optimize:
+                optimizer = import_tool("compiler", "optimizer")
+                tree = optimizer.TreeOptimizer().optimize(tree)
+            generator = import_tool("compiler", "code_generator")
+            generator.CodeGenerator(
+                optimize=self._optimize, pool_strings=self._pool_strings
+            ).write(tree, writer)
+        except Exception as e:
+            raise BuildException(f"{fname}: {type(e).__name__}: {e}")
+        return writer.commands
+
+    def _dump(self, units, asm_lines):
+        os.makedirs(self._dump_dir, exist_ok=True)
+        for class_name, commands in units:
+            vm_fname = os.path.join(self._dump_dir, f"{class_name}.vm")
+            with open(vm_fname, "w") as f:
+                f.writelines(" ".join(tokens) + "\n" for tokens in commands)
+
+        with open(os.path.join(self._dump_dir, "Program.asm"), "w") as f:
+            for code, comment in asm_lines:
+                f.write(f"{code} // {comment}\n" if comment else f"{code}\n")
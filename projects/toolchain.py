@@ -0,0 +1,72 @@
+"""
+Helpers for using one tool's modules from another.
+
+Each tool directory (assembler, vm_translator, compiler, ...) is run as a
+script and imports its siblings by bare name, and several tools share module
+names such as runner, parser and encoder. import_tool loads a tool's modules
+with only that tool's directory on the path and then takes them back out of
+sys.modules, so tools can be combined in one process without clobbering
+each other.
+"""
+import importlib
+import os
+import sys
+
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_loaded = {}
+
+
+def _module_names(tool_dir):
+    return {
+        os.path.splitext(fname)[0]
+        for fname in os.listdir(tool_dir)
+        if fname.endswith(".py") and fname != "__main__.py"
+    }
+
+
+def _is_from(module, tool_dir):
+    fname = getattr(module, "__file__", None)
+    return fname is not None and os.path.dirname(
+        os.path.abspath(fname)
+    ) == os.path.abspath(tool_dir)
+
+
+def import_tool(tool, module_name):
+    """
+    Imports and returns module_name from the tool directory named tool.
+    """
+    tool_dir = os.path.join(TOOLS_DIR, tool)
+    names = _module_names(tool_dir)
+    if module_name not in names:
+        raise ImportError(f'Tool "{tool}" has no module "{module_name}"')
+
+    tool_modules = _loaded.setdefault(tool, {})
+    if module_name in tool_modules:
+        return tool_modules[module_name]
+
+    saved = {
+        name: sys.modules[name] for name in names if name in sys.modules
+    }
+    for name, module in saved.items():
+        if _is_from(module, tool_dir):
+            # the caller is this tool, share its already imported modules
+            tool_modules.setdefault(name, module)
+
+    sys.path.insert(0, tool_dir)
+    try:
+        for name in names:
+            sys.modules.pop(name, None)
+        sys.modules.update(tool_modules)
+        module = importlib.import_module(module_name)
+        for name in names:
+            if name in sys.modules:
+                tool_modules[name] = sys.modules[name]
+    finally:
+        sys.path.remove(tool_dir)
+        for name in names:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+    return module
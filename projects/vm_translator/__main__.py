@@ -1,6 +1,8 @@
 import argparse
 import os
 
+from cache import DEFAULT_MAX_BYTES, TranslationCache
+from fusion import summarize
 from runner import Runner
 
 
@@ -9,6 +11,55 @@ if __name__ == "__main__":
         description="Translate input file into hack assembly code."
     )
     parser.add_argument("input_file", help="Name of vm file to convert.")
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Run the peephole optimizer over the generated assembly.",
+    )
+    parser.add_argument(
+        "--shared-calls",
+        action="store_true",
+        help="Jump to one shared call routine and one shared return routine "
+        "instead of inlining them at every call and return.",
+    )
+    parser.add_argument(
+        "--shared-comparisons",
+        action="store_true",
+        help="Jump to one shared routine per comparison kind instead of "
+        "inlining eq, gt and lt.",
+    )
+    parser.add_argument(
+        "--fuse",
+        action="store_true",
+        help="Encode common sequences of VM commands as superinstructions, "
+        "and print how often each was used and the instructions it saved.",
+    )
+    parser.add_argument(
+        "--tos-in-d",
+        action="store_true",
+        help="Keep the top of the stack in D between the commands of a basic "
+        "block, writing it to memory only at labels, jumps, calls and "
+        "returns.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes translating the .vm files of a "
+        "directory (0 for one per CPU).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory caching the translation of each .vm file, reused "
+        "while the file, the translator and the options are unchanged.",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Size cap of the cache, least recently used entries are "
+        "evicted beyond it.",
+    )
     args = parser.parse_args()
     input_fname = args.input_file
     if os.path.isfile(input_fname):
@@ -20,4 +71,23 @@ if __name__ == "__main__":
             input_fname, os.path.basename(input_fname.rstrip("/")) + ".asm"
         )
 
-    Runner(input_fname).run(output_fname)
+    cache = (
+        TranslationCache(args.cache_dir, args.cache_max_bytes)
+        if args.cache_dir
+        else None
+    )
+    runner = Runner(
+        input_fname,
+        optimize=args.optimize,
+        shared_calls=args.shared_calls,
+        shared_comparisons=args.shared_comparisons,
+        fuse=args.fuse,
+        tos_in_d=args.tos_in_d,
+        jobs=args.jobs or os.cpu_count(),
+        cache=cache,
+    )
+    runner.run(output_fname)
+    if cache is not None:
+        print(cache.summary())
+    if args.fuse:
+        print(summarize(runner.fusion_hits, runner.fusion_savings))
@@ -0,0 +1,152 @@
+import argparse
+from glob import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from runner import Runner
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_TESTS = [
+    os.path.join(_PROJECTS_DIR, project, "*", "*", "*.tst")
+    for project in ["07", "08"]
+]
+_DEFAULT_PROGRAMS = [
+    os.path.join(os.path.dirname(_PROJECTS_DIR), "tools", "OS")
+]
+
+# translator options compared by the benchmark, baseline first
+MODES = {
+    "baseline": {},
+    "optimize": {"optimize": True},
+    "shared-calls": {"shared_calls": True},
+    "shared-comparisons": {"shared_comparisons": True},
+    "fuse": {"fuse": True},
+    "optimize-fuse": {"optimize": True, "fuse": True},
+    "tos-in-d": {"tos_in_d": True},
+    "optimize-tos-in-d": {"optimize": True, "tos_in_d": True},
+}
+
+
+def _translate(test_dir, asm_fname, options):
+    vm_fnames = glob(os.path.join(test_dir, "*.vm"))
+    if any(os.path.basename(f) == "Sys.vm" for f in vm_fnames):
+        in_fname = test_dir
+    else:
+        in_fname = os.path.splitext(asm_fname)[0] + ".vm"
+    Runner(in_fname, **options).run(asm_fname)
+
+
+def run_test(tst_fname, options):
+    """
+    Translates the program a VM test script loads with the given options
+    and runs the script on the Python emulator. Returns the ROM size, the
+    cycles executed and an error message, or None if the test passed.
+    """
+    script_module = import_tool("emulator", "script")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_dir = os.path.join(tmp_dir, "test")
+        shutil.copytree(os.path.dirname(tst_fname), test_dir)
+        asm_fname = os.path.join(
+            test_dir, os.path.basename(tst_fname)[: -len(".tst")] + ".asm"
+        )
+        _translate(test_dir, asm_fname, options)
+        script = script_module.TestScript(
+            os.path.join(test_dir, os.path.basename(tst_fname))
+        )
+        try:
+            script.run()
+            error = None
+        except script_module.ScriptException as e:
+            error = str(e)
+
+    return len(script.cpu.rom), script.cpu.cycles, error
+
+
+def _width(mode):
+    return max(18, len(mode) + 6)
+
+
+def program_rom_size(vm_dir, options):
+    """
+    Translates and assembles every .vm file in vm_dir with the given options
+    and returns the number of instructions in the resulting ROM.
+    """
+    runner_module = import_tool("assembler", "runner")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asm_fname = os.path.join(tmp_dir, "program.asm")
+        Runner(vm_dir, **options).run(asm_fname)
+        return len(runner_module.Runner(asm_fname).assemble())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare ROM size and cycles of translator options on VM "
+        "test programs."
+    )
+    parser.add_argument(
+        "test_scripts",
+        nargs="*",
+        help="CPU emulator .tst scripts. Defaults to the project 07 and 08 "
+        "tests.",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=list(MODES),
+        default=list(MODES),
+        help="Translator options to compare.",
+    )
+    parser.add_argument(
+        "--programs",
+        nargs="*",
+        default=_DEFAULT_PROGRAMS,
+        help="Directories of .vm files whose ROM size is compared without "
+        "running them. Defaults to the Jack OS.",
+    )
+    args = parser.parse_args()
+    tst_fnames = args.test_scripts or sorted(
+        f
+        for pattern in _DEFAULT_TESTS
+        for f in glob(pattern)
+        if not f.endswith("VME.tst")
+    )
+
+    header = f"{'test':<20}" + "".join(
+        f"{mode + ' rom':>{_width(mode)}}{'cycles':>9}" for mode in args.modes
+    )
+    print(header)
+    totals = {mode: [0, 0] for mode in args.modes}
+    failures = []
+    for tst_fname in tst_fnames:
+        row = f"{os.path.basename(tst_fname)[:-4]:<20}"
+        for mode in args.modes:
+            rom_size, cycles, error = run_test(tst_fname, MODES[mode])
+            totals[mode][0] += rom_size
+            totals[mode][1] += cycles
+            row += f"{rom_size:>{_width(mode)}}{cycles:>9}"
+            if error:
+                failures.append(f"{tst_fname} ({mode}): {error}")
+        print(row)
+
+    print(
+        f"{'total':<20}"
+        + "".join(
+            f"{rom:>{_width(mode)}}{cycles:>9}"
+            for mode, (rom, cycles) in totals.items()
+        )
+    )
+    for vm_dir in args.programs:
+        row = f"{os.path.basename(vm_dir.rstrip(os.sep)):<20}"
+        for mode in args.modes:
+            rom_size = program_rom_size(vm_dir, MODES[mode])
+            row += f"{rom_size:>{_width(mode)}}{'':>9}"
+        print(row)
+    if failures:
+        print("\n".join(["Failures:"] + failures))
+        sys.exit(1)
@@ -0,0 +1,150 @@
+from collections import Counter
+import hashlib
+import os
+
+
+# cap on the total size of cached translations, enforced as entries are
+# written by evicting the least recently used
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SOURCE_FILES = [
+    "encoder.py",
+    "fusion.py",
+    "optimizer.py",
+    "parser.py",
+    "runner.py",
+    "top_of_stack.py",
+]
+
+
+def _translator_version():
+    """
+    Hash of the translator's own source, so editing it invalidates every
+    cached translation.
+    """
+    sha = hashlib.sha1()
+    for fname in _SOURCE_FILES:
+        with open(os.path.join(_SOURCE_DIR, fname), "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+TRANSLATOR_VERSION = _translator_version()
+
+
+class TranslationCache(object):
+    """
+    On-disk store of the assembly translated from single .vm files, keyed on
+    the file's name and content, the translator version and the options.
+
+    Each entry is one file whose first line lists the shared routines the
+    translation jumps to and whose second line the superinstructions used,
+    as name:hits:savings. Reading an entry refreshes its mtime, which
+    orders entries for least recently used eviction.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self._dir = cache_dir
+        self._max_bytes = max_bytes
+        self._total_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.evicted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(vm_fname, options):
+        sha = hashlib.sha1(TRANSLATOR_VERSION.encode())
+        # labels and static variables are named after the file's class
+        sha.update(os.path.basename(vm_fname).encode())
+        sha.update(repr(sorted(options.items())).encode())
+        with open(vm_fname, "rb") as f:
+            sha.update(f.read())
+        return sha.hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached (text, routines, fusion_hits, fusion_savings) for
+        key, or None.
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, "r") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted by another translator since it was read
+            pass
+        self.hits += 1
+        self.bytes_read += len(data)
+        routines, _, data = data.partition("\n")
+        fusion, _, text = data.partition("\n")
+        hits, savings = Counter(), Counter()
+        for entry in fusion.split():
+            name, n_hits, n_saved = entry.split(":")
+            hits[name] = int(n_hits)
+            savings[name] = int(n_saved)
+        return text, set(routines.split()), hits, savings
+
+    def put(self, key, text, routines, fusion_hits, fusion_savings):
+        fusion = " ".join(
+            f"{name}:{fusion_hits[name]}:{fusion_savings[name]}"
+            for name in sorted(fusion_hits)
+        )
+        data = " ".join(sorted(routines)) + "\n" + fusion + "\n" + text
+        path = self._path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        # an entry written again replaces the old one's size in the total
+        try:
+            replaced_bytes = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced_bytes = 0
+        # concurrent builds sharing the cache never see partial entries
+        os.replace(tmp_path, path)
+        self.bytes_written += len(data)
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._total_bytes += len(data) - replaced_bytes
+        if self._total_bytes > self._max_bytes:
+            self._evict()
+
+    def summary(self):
+        return (
+            f"Cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.bytes_read} bytes read, {self.bytes_written} bytes "
+            f"written, {self.evicted} evicted"
+        )
+
+    def _path_for(self, key):
+        return os.path.join(self._dir, f"{key}.asm")
+
+    def _entries(self):
+        """
+        Yields (mtime, size, path) for every cached translation.
+        """
+        for entry in os.scandir(self._dir):
+            if entry.name.endswith(".asm"):
+                stat = entry.stat()
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._total_bytes <= self._max_bytes:
+                break
+            os.remove(path)
+            self._total_bytes -= size
+            self.evicted += 1
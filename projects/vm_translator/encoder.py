@@ -30,15 +30,35 @@ SEG_POINTER = "pointer"
 SEG_CONSTANT = "constant"
 SEG_TEMP = "temp"
 
+# entry points of the routines shared by every call site and return when
+# translating with shared_calls, and the registers call sites pass them in
+CALL_ROUTINE = "$CALL"
+RETURN_ROUTINE = "$RETURN"
+ROUTINES_END = "$END_ROUTINES"
+CALL_RETURN_ADDR = "R13"
+CALL_TARGET = "R14"
+CALL_N_ARGS = "R15"
+
+# entry points of the comparison routines used with shared_comparisons, and
+# the register call sites pass the return address in
+COMPARISON_ROUTINES = {EQ: "$EQ", GT: "$GT", LT: "$LT"}
+COMPARISON_RETURN_ADDR = "R15"
+
 _LOAD_UNARY = ["@SP", "D=M-1", "M=D", "A=D", "D=M"]
-_jmp_label_ct = 0
-_call_label_ct = 0
 
 
 def _do_push():
     return ["@SP", "A=M", "M=D", "D=A+1", "@SP", "M=D"]
 
 
+def _cheapest(*candidates):
+    """
+    Picks the shortest of several equivalent straight-line sequences, which
+    is also the one taking the fewest cycles. Ties go to the first.
+    """
+    return min(candidates, key=len)
+
+
 class EncodingException(Exception):
     pass
 
@@ -53,6 +73,15 @@ class ArithmeticEncoder(AbstractEncoder):
     _LOAD_BINARY = ["@SP", "D=M-1", "D=D-1", "M=D", "A=D+1", "D=M", "A=A-1"]
     _STORE = ["@SP", "A=M", "M=D", "D=A+1", "@SP", "M=D"]
 
+    _JUMPS = {EQ: "D;JEQ", GT: "D;JGT", LT: "D;JLT"}
+
+    def __init__(self, class_scope, shared_comparisons=False):
+        # labels are numbered per file and prefixed with the file's class, so
+        # files can be translated independently and in any order
+        self._class_scope = class_scope
+        self._shared_comparisons = shared_comparisons
+        self._jmp_label_ct = 0
+
     def _encode_math_or_logic(self, cmd):
         if cmd in [ADD, SUB, AND, OR]:
             load_lines = self._LOAD_BINARY[:]
@@ -70,23 +99,33 @@ class ArithmeticEncoder(AbstractEncoder):
 
         return load_lines + [asm_cmd] + self._STORE
 
+    def _comp_labels(self, cmd):
+        """
+        Returns the id, true label and end label of the next comparison.
+        """
+        label_id = f"{cmd}_{self._jmp_label_ct}".upper()
+        true_label = f"{self._class_scope}$JMP_{label_id}"
+        end_label = f"{self._class_scope}$END_JMP_{label_id}"
+        self._jmp_label_ct += 1
+        return label_id, true_label, end_label
+
     def _encode_comp(self, cmd):
-        global _jmp_label_ct
-        true_label = f"JMP_{cmd}_{_jmp_label_ct}".upper()
-        end_label = f"END_JMP_{cmd}_{_jmp_label_ct}".upper()
-        _jmp_label_ct += 1
-
-        if cmd == GT:
-            jmp_cmd = "D;JGT"
-        elif cmd == LT:
-            jmp_cmd = "D;JLT"
-        else:
-            jmp_cmd = "D;JEQ"
+        label_id, true_label, end_label = self._comp_labels(cmd)
+
+        if self._shared_comparisons:
+            return_label = f"{self._class_scope}$RETURN_FROM_{label_id}"
+            return [
+                f"@{return_label}",
+                "D=A",
+                f"@{COMPARISON_ROUTINES[cmd]}",
+                "0;JMP",
+                f"({return_label})",
+            ]
 
         comp_lines = [
             "D=M-D",
             f"@{true_label}",
-            jmp_cmd,
+            self._JUMPS[cmd],
             "D=0",
             f"@{end_label}",
             "0;JMP",
@@ -97,6 +136,33 @@ class ArithmeticEncoder(AbstractEncoder):
 
         return self._LOAD_BINARY[:] + comp_lines + self._STORE
 
+    @classmethod
+    def _encode_comp_routine(cls, cmd):
+        """
+        Body shared by every comparison of one kind: expects the return
+        address in D, replaces the top two stack values with the result.
+        """
+        routine = COMPARISON_ROUTINES[cmd]
+        return [
+            f"@{COMPARISON_RETURN_ADDR}",
+            "M=D",
+            "@SP",
+            "AM=M-1",
+            "D=M",
+            "A=A-1",
+            "D=M-D",
+            "M=-1",  # true unless the jump falls through
+            f"@{routine}_RETURN",
+            cls._JUMPS[cmd],
+            "@SP",
+            "A=M-1",
+            "M=0",
+            f"({routine}_RETURN)",
+            f"@{COMPARISON_RETURN_ADDR}",
+            "A=M",
+            "0;JMP",
+        ]
+
     def encode(self, cmd):
         if cmd in [ADD, SUB, NEG, AND, OR, NOT]:
             return self._encode_math_or_logic(cmd)
@@ -146,21 +212,48 @@ class MemoryEncoder(AbstractEncoder):
         else:
             raise EncodingException(f'Unknown memory segment "{seg_name}".')
 
+    def load(self, seg_name, index):
+        """
+        Lines loading a segment entry or a constant into D, as a push does
+        before pushing it.
+        """
+        if seg_name == SEG_CONSTANT and str(index) in ("0", "1"):
+            return [f"D={index}"]
+        return self.encode(PUSH, seg_name, index)[: -len(_do_push())]
+
+    def address(self, seg_name, index):
+        """
+        Lines pointing A at a segment entry without touching D.
+        """
+        index = int(index)
+        if seg_name in self.POINTER_SEGMENTS_MAP:
+            reg = self.POINTER_SEGMENTS_MAP[seg_name]
+            return [f"@{reg}", "A=M"] + ["A=A+1"] * index
+        # a pop validates the segment and index and ends with the address
+        return self.encode(POP, seg_name, index)[len(self._prep_for_pop()) : -1]
+
     def _encode_constant_seg(self, value):
         return [f"@{value}", "D=A"] + _do_push()
 
     def _encode_pointer_segs(self, cmd, seg_name, index):
         reg = self.POINTER_SEGMENTS_MAP[seg_name]
+        # small indices are cheapest as increments of the base address,
+        # larger ones are added in constant time
         if cmd == PUSH:
-            lines = [f"@{reg}", "A=M"]
-            for _ in range(index):
-                lines.append("A=A+1")
+            unrolled = [f"@{reg}", "A=M"] + ["A=A+1"] * index
+            computed = [f"@{index}", "D=A", f"@{reg}", "A=D+M"]
+            lines = _cheapest(unrolled, computed)
             lines.append("D=M")
             lines.extend(_do_push())
         else:
-            lines = self._prep_for_pop()
-            lines.extend([f"@{reg}", "A=M"])
-            lines.extend(["A=A+1"] * index)
+            # the popped value occupies D, so a computed address is kept in
+            # R13 while popping
+            unrolled = self._prep_for_pop()
+            unrolled.extend([f"@{reg}", "A=M"] + ["A=A+1"] * index)
+            computed = [f"@{reg}", "D=M", f"@{index}", "D=D+A", "@R13", "M=D"]
+            computed.extend(self._prep_for_pop())
+            computed.extend(["@R13", "A=M"])
+            lines = _cheapest(unrolled, computed)
             lines.append("M=D")
 
         return lines
@@ -245,8 +338,10 @@ class FunctionEncoder(AbstractEncoder):
     def is_func_return(cmd):
         return cmd == "return"
 
-    def __init__(self, class_scope):
+    def __init__(self, class_scope, shared_calls=False):
         self._class_scope = class_scope
+        self._shared_calls = shared_calls
+        self._call_label_ct = 0
 
     def encode(self, cmd, *args):
         if self.is_func_declaration(cmd):
@@ -262,6 +357,8 @@ class FunctionEncoder(AbstractEncoder):
                     '"return" command takes no arguments.'
                     " Received {}".format(args)
                 )
+            if self._shared_calls:
+                return [f"@{RETURN_ROUTINE}", "0;JMP"]
             return self._encode_func_return()
         else:
             if len(args) != 2:
@@ -279,10 +376,14 @@ class FunctionEncoder(AbstractEncoder):
         return lines
 
     def _encode_call(self, func_name, n_vars):
-        global _call_label_ct
         lines = []
-        return_label = f"RETURN_FROM_{func_name}_{_call_label_ct}"
-        _call_label_ct += 1
+        return_label = (
+            f"{self._class_scope}$RETURN_FROM_{func_name}_{self._call_label_ct}"
+        )
+        self._call_label_ct += 1
+
+        if self._shared_calls:
+            return self._encode_shared_call(func_name, n_vars, return_label)
 
         lines.extend(
             [f"@{return_label}", "D=A"]
@@ -295,8 +396,8 @@ class FunctionEncoder(AbstractEncoder):
 
         # we rely on the fact that _do_push leaves SP in the A register
         lines.append("D=M")
-        for _ in range(self.NUM_SAVED_VARS + int(n_vars)):
-            lines.append("D=D-1")
+        offset = self.NUM_SAVED_VARS + int(n_vars)
+        lines.extend(_cheapest(["D=D-1"] * offset, [f"@{offset}", "D=D-A"]))
         lines.extend(
             [
                 f"@{ARG}",
@@ -312,12 +413,65 @@ class FunctionEncoder(AbstractEncoder):
         )
         return lines
 
+    @staticmethod
+    def _encode_shared_call(func_name, n_vars, return_label):
+        n_vars = int(n_vars)
+        return [
+            f"@{return_label}",
+            "D=A",
+            f"@{CALL_RETURN_ADDR}",
+            "M=D",
+            f"@{func_name}",
+            "D=A",
+            f"@{CALL_TARGET}",
+            "M=D",
+            *([f"D={n_vars}"] if n_vars < 2 else [f"@{n_vars}", "D=A"]),
+            f"@{CALL_ROUTINE}",
+            "0;JMP",  # the call routine jumps to the function
+            f"({return_label})",
+        ]
+
+    def _encode_call_routine(self):
+        """
+        Body shared by every call site: expects the return address, the
+        function address and the number of arguments in D.
+        """
+        lines = [f"@{CALL_N_ARGS}", "M=D", f"@{CALL_RETURN_ADDR}", "D=M"]
+        lines.extend(_do_push())  # push return address onto stack
+        for ptr_addr in self.SAVED_CALLER_STATE:
+            lines.extend([f"@{ptr_addr}", "D=M"])
+            lines.extend(_do_push())  # push func state onto stack
+
+        lines.extend(
+            [
+                "D=M",
+                f"@{CALL_N_ARGS}",
+                "D=D-M",
+                f"@{self.NUM_SAVED_VARS}",
+                "D=D-A",
+                f"@{ARG}",
+                "M=D",  # reposition ARG to SP - n_vars - self.NUM_SAVED_VARS
+                "@SP",
+                "D=M",
+                f"@{LCL}",
+                "M=D",  # reposition LCL to SP
+                f"@{CALL_TARGET}",
+                "A=M",
+                "0;JMP",  # jump to function
+            ]
+        )
+        return lines
+
     def _encode_func_return(self):
         frame = "R13"
         ret = "R14"
-        lines = ["@LCL", "D=M", f"@{frame}", "M=D", "A=D"]  # store LCL in frame
-        for _ in range(self.NUM_SAVED_VARS):
-            lines.append("A=A-1")
+        lines = ["@LCL", "D=M", f"@{frame}", "M=D"]  # store LCL in frame
+        lines.extend(
+            _cheapest(
+                ["A=D"] + ["A=A-1"] * self.NUM_SAVED_VARS,
+                [f"@{self.NUM_SAVED_VARS}", "A=D-A"],
+            )
+        )
         lines.extend(
             [
                 "D=M",
@@ -335,11 +489,9 @@ class FunctionEncoder(AbstractEncoder):
             ]
         )
 
-        for i, state in enumerate(reversed(self.SAVED_CALLER_STATE)):
-            lines.extend([f"@{frame}", "A=M-1"])
-            for j in range(i):
-                lines.append("A=A-1")
-            lines.extend(["D=M", f"@{state}", "M=D"])  # restore state of caller
+        # walk frame down through the saved pointers, restoring the caller
+        for state in reversed(self.SAVED_CALLER_STATE):
+            lines.extend([f"@{frame}", "AM=M-1", "D=M", f"@{state}", "M=D"])
 
         lines.extend([f"@{ret}", "A=M", "0;JMP"])  # go to return address
 
@@ -347,8 +499,40 @@ class FunctionEncoder(AbstractEncoder):
 
 
 class InitEncoder(AbstractEncoder):
+    def __init__(self, shared_calls=False):
+        self._shared_calls = shared_calls
+
     def encode(self):
         lines = ["@256", "D=A", "@SP", "M=D"]  # initialize SP to 256
-        f_enc = FunctionEncoder("Sys")
+        # scoped apart from the return labels of Sys.vm itself
+        f_enc = FunctionEncoder("$init", shared_calls=self._shared_calls)
         lines.extend(f_enc.encode("call", "Sys.init", "0"))
         return lines
+
+
+class RoutineEncoder(AbstractEncoder):
+    """
+    Routines emitted once per program and jumped to from the translated
+    commands, preceded by a jump over them for code that runs into them.
+    Takes the entry labels of the routines the program uses.
+    """
+
+    def __init__(self, routines):
+        self._routines = routines
+
+    def encode(self):
+        lines = [f"@{ROUTINES_END}", "0;JMP"]
+        if CALL_ROUTINE in self._routines:
+            f_enc = FunctionEncoder(None)
+            lines.append(f"({CALL_ROUTINE})")
+            lines.extend(f_enc._encode_call_routine())
+            lines.append(f"({RETURN_ROUTINE})")
+            lines.extend(f_enc._encode_func_return())
+
+        for cmd, routine in COMPARISON_ROUTINES.items():
+            if routine in self._routines:
+                lines.append(f"({routine})")
+                lines.extend(ArithmeticEncoder._encode_comp_routine(cmd))
+
+        lines.append(f"({ROUTINES_END})")
+        return lines
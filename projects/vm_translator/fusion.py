@@ -0,0 +1,272 @@
+from encoder import (
+    PUSH,
+    POP,
+    ADD,
+    SUB,
+    AND,
+    OR,
+    NOT,
+    EQ,
+    GT,
+    LT,
+    SEG_CONSTANT,
+    SEG_POINTER,
+    SEG_TEMP,
+    AbstractEncoder,
+    FlowControlEncoder,
+    MemoryEncoder,
+)
+
+
+_POP_TO_D = ["@SP", "AM=M-1", "D=M"]
+
+# x op D for the top of the stack x, written back in place
+_OPERAND_OPS = {ADD: "M=D+M", SUB: "M=M-D", AND: "M=D&M", OR: "M=D|M"}
+
+# jumps taken when a comparison is true, and when it is false, on x - y
+_JUMPS_IF_TRUE = {EQ: "JEQ", GT: "JGT", LT: "JLT"}
+_JUMPS_IF_FALSE = {EQ: "JNE", GT: "JLE", LT: "JGE"}
+
+
+def _is_push(tokens):
+    return tokens[0] == PUSH
+
+
+def _is_pop(tokens):
+    return tokens[0] == POP
+
+
+def _is_comparison(tokens):
+    return tokens[0] in _JUMPS_IF_TRUE
+
+
+def _is_zero(tokens):
+    return tokens == [PUSH, SEG_CONSTANT, "0"]
+
+
+def _is_one(tokens):
+    return tokens == [PUSH, SEG_CONSTANT, "1"]
+
+
+def _match_array_store(window):
+    # the code Jack compilers emit for "let a[i] = x"
+    return (
+        window[0] == [POP, SEG_TEMP, "0"]
+        and window[1] == [POP, SEG_POINTER, "1"]
+        and window[2] == [PUSH, SEG_TEMP, "0"]
+        and window[3][:2] == [POP, "that"]
+    )
+
+
+def _match_increment(window):
+    return (
+        _is_push(window[0])
+        and window[0][1] != SEG_CONSTANT
+        and _is_one(window[1])
+        and window[2][0] in (ADD, SUB)
+        and window[3] == [POP] + window[0][1:]
+    )
+
+
+def _match_compare_branch_if_false(window):
+    # the if and while conditions of the unoptimized compiler
+    return (
+        _is_comparison(window[0])
+        and _is_zero(window[1])
+        and window[2] == [EQ]
+        and window[3][0] == "if-goto"
+    )
+
+
+def _match_compare_not_branch(window):
+    # the same conditions from the optimizing compiler
+    return (
+        _is_comparison(window[0])
+        and window[1] == [NOT]
+        and window[2][0] == "if-goto"
+    )
+
+
+def _match_compare_branch(window):
+    return _is_comparison(window[0]) and window[1][0] == "if-goto"
+
+
+def _with_operand(matcher):
+    """
+    Matches the sequences of matcher preceded by a push of their second
+    operand, which is then compared straight from D.
+    """
+    return lambda window: _is_push(window[0]) and matcher(window[1:])
+
+
+def _match_branch_if_zero(window):
+    return (
+        _is_zero(window[0]) and window[1] == [EQ] and window[2][0] == "if-goto"
+    )
+
+
+def _match_branch_if_not_true(window):
+    return window[0] == [NOT] and window[1][0] == "if-goto"
+
+
+def _match_move(window):
+    return (
+        _is_push(window[0])
+        and _is_pop(window[1])
+        and window[1][1] != SEG_CONSTANT
+    )
+
+
+def _match_operand_op(window):
+    return _is_push(window[0]) and window[1][0] in _OPERAND_OPS
+
+
+def _match_push_pair(window):
+    # only in runs of arguments and constants, the second push is better
+    # fused with or optimized into any other command after it
+    return (
+        _is_push(window[0])
+        and _is_push(window[1])
+        and (len(window) == 2 or window[2][0] in (PUSH, "call"))
+    )
+
+
+# superinstructions with the number of commands they cover, longest first
+# so that no shorter one takes their start, then by how often they apply in
+# the projects 09 to 12 Jack sources as fusion_table.py counts them
+PATTERNS = [
+    (
+        "operand-compare-branch-if-false",
+        5,
+        _with_operand(_match_compare_branch_if_false),
+    ),
+    ("compare-branch-if-false", 4, _match_compare_branch_if_false),
+    ("operand-compare-not-branch", 4, _with_operand(_match_compare_not_branch)),
+    ("increment", 4, _match_increment),
+    ("array-store", 4, _match_array_store),
+    ("branch-if-zero", 3, _match_branch_if_zero),
+    ("operand-compare-branch", 3, _with_operand(_match_compare_branch)),
+    ("compare-not-branch", 3, _match_compare_not_branch),
+    ("push-pair", 2, _match_push_pair),
+    ("move", 2, _match_move),
+    ("operand-op", 2, _match_operand_op),
+    ("compare-branch", 2, _match_compare_branch),
+    ("branch-if-not-true", 2, _match_branch_if_not_true),
+]
+
+MAX_LENGTH = max(length for _, length, _ in PATTERNS)
+
+
+class SuperinstructionEncoder(AbstractEncoder):
+    """
+    Encodes sequences of VM commands that compiled Jack code uses
+    constantly as one piece of assembly, keeping intermediate values in D
+    and in place on the stack instead of pushing and popping them.
+
+    Only sequences without labels between their commands are fused, so no
+    jump can land inside one, and every fused sequence leaves the stack,
+    the segments and temp exactly as the separate commands would.
+    """
+
+    def __init__(self, class_scope, func_scope):
+        self._memory = MemoryEncoder(class_scope)
+        self._flow = FlowControlEncoder(func_scope)
+
+    @staticmethod
+    def match(window):
+        """
+        Returns the name of the pattern the commands at the start of window,
+        a list of token lists, form and the number of commands it covers,
+        or (None, 0).
+        """
+        for name, length, matcher in PATTERNS:
+            if len(window) >= length and matcher(window):
+                return name, length
+        return None, 0
+
+    def encode(self, name, window):
+        if name == "array-store":
+            return (
+                _POP_TO_D
+                + ["@R5", "M=D"]
+                + _POP_TO_D
+                + ["@THAT", "M=D", "@R5", "D=M"]
+                + self._memory.address(*window[3][1:])
+                + ["M=D"]
+            )
+        elif name == "increment":
+            step = "M=M+1" if window[2][0] == ADD else "M=M-1"
+            return self._memory.address(*window[0][1:]) + [step]
+        elif name in ("compare-branch-if-false", "compare-not-branch"):
+            jump = _JUMPS_IF_FALSE[window[0][0]]
+            return self._compare_branch(jump, window[-1][1])
+        elif name in (
+            "operand-compare-branch-if-false",
+            "operand-compare-not-branch",
+        ):
+            jump = _JUMPS_IF_FALSE[window[1][0]]
+            return self._operand_compare_branch(jump, window)
+        elif name == "operand-compare-branch":
+            jump = _JUMPS_IF_TRUE[window[1][0]]
+            return self._operand_compare_branch(jump, window)
+        elif name == "branch-if-zero":
+            return _POP_TO_D + self._jump("JEQ", window[2][1])
+        elif name == "push-pair":
+            return (
+                self._memory.load(*window[0][1:])
+                + ["@SP", "A=M", "M=D"]
+                + self._memory.load(*window[1][1:])
+                + ["@SP", "AM=M+1", "M=D", "@SP", "M=M+1"]
+            )
+        elif name == "move":
+            return (
+                self._memory.load(*window[0][1:])
+                + self._memory.address(*window[1][1:])
+                + ["M=D"]
+            )
+        elif name == "operand-op":
+            load = self._memory.load(*window[0][1:])
+            return load + ["@SP", "A=M-1", _OPERAND_OPS[window[1][0]]]
+        elif name == "compare-branch":
+            jump = _JUMPS_IF_TRUE[window[0][0]]
+            return self._compare_branch(jump, window[1][1])
+        elif name == "branch-if-not-true":
+            # ~x is true unless x is -1
+            return ["@SP", "AM=M-1", "D=M+1"] + self._jump("JNE", window[1][1])
+
+    def _compare_branch(self, jump, label):
+        # x - y for the top two stack values x and y, as the comparisons
+        # compute it, with both popped
+        return [
+            "@SP",
+            "AM=M-1",
+            "D=M",
+            "A=A-1",
+            "D=M-D",
+            "@SP",
+            "M=M-1",
+        ] + self._jump(jump, label)
+
+    def _operand_compare_branch(self, jump, window):
+        # the pushed operand y is only ever in D
+        return (
+            self._memory.load(*window[0][1:])
+            + ["@SP", "AM=M-1", "D=M-D"]
+            + self._jump(jump, window[-1][1])
+        )
+
+    def _jump(self, jump, label):
+        return [f"@{self._flow._scoped_label_for(label)}", f"D;{jump}"]
+
+
+def summarize(hits, savings):
+    """
+    Formats per-pattern hit counts and the instructions each saved.
+    """
+    lines = [f"{'superinstruction':<34}{'hits':>8}{'saved':>10}"]
+    for name, _, _ in PATTERNS:
+        lines.append(f"{name:<34}{hits[name]:>8}{savings[name]:>10}")
+    total_hits = sum(hits.values())
+    total_saved = sum(savings.values())
+    lines.append(f"{'total':<34}{total_hits:>8}{total_saved:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,131 @@
+import argparse
+from collections import Counter
+from glob import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from fusion import summarize
+from parser import Parser
+from runner import Runner
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_PROJECTS = ["09", "10", "11", "12"]
+
+
+def _shape(tokens):
+    """
+    The command with the operands that vary between occurrences of the same
+    idiom replaced: labels, functions and segment indices, except those of
+    pointer and temp and the constants 0 and 1.
+    """
+    cmd = tokens[0]
+    if cmd in ("push", "pop"):
+        seg_name, index = tokens[1:]
+        if seg_name in ("pointer", "temp") or (
+            seg_name == "constant" and index in ("0", "1")
+        ):
+            return " ".join(tokens)
+        return f"{cmd} {seg_name} i"
+    elif cmd in ("label", "goto", "if-goto"):
+        return f"{cmd} L"
+    elif cmd in ("call", "function"):
+        return f"{cmd} f n"
+    return cmd
+
+
+def compile_programs(projects, build_dir, optimize):
+    """
+    Compiles every directory of .jack files in the projects into a copy
+    under build_dir. Returns the copies.
+    """
+    compiler = import_tool("compiler", "runner")
+    program_dirs = []
+    for project in projects:
+        jack_fnames = glob(
+            os.path.join(_PROJECTS_DIR, project, "**", "*.jack"), recursive=True
+        )
+        for src_dir in sorted({os.path.dirname(f) for f in jack_fnames}):
+            rel_dir = os.path.relpath(src_dir, _PROJECTS_DIR)
+            program_dir = os.path.join(build_dir, rel_dir)
+            os.makedirs(program_dir)
+            for jack_fname in glob(os.path.join(src_dir, "*.jack")):
+                copied = shutil.copy(jack_fname, program_dir)
+                _, _, error = compiler.compile_file(copied, optimize=optimize)
+                if error:
+                    raise ValueError(f"{jack_fname}: {error}")
+            program_dirs.append(program_dir)
+    return program_dirs
+
+
+def count_sequences(vm_fnames, max_length):
+    """
+    Counts the shapes of the sequences of 2 to max_length commands in the
+    files that no label or function declaration interrupts.
+    """
+    counts = Counter()
+    for vm_fname in vm_fnames:
+        shapes = [_shape(tokens) for tokens, _ in Parser.parse_lines(vm_fname)]
+        for start in range(len(shapes)):
+            last = min(start + max_length, len(shapes))
+            for end in range(start + 2, last + 1):
+                if shapes[end - 1].startswith(("label", "function")):
+                    break
+                counts[" ; ".join(shapes[start:end])] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the Jack programs of the book's projects and "
+        "print the most frequent sequences of VM commands, the table the "
+        "translator's superinstructions were picked from, and how often "
+        "each superinstruction applies and the instructions it saves."
+    )
+    parser.add_argument(
+        "projects",
+        nargs="*",
+        default=_DEFAULT_PROJECTS,
+        help="Project directories to take .jack files from. Defaults to 09 "
+        "to 12.",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Compile with the compiler's optimizations.",
+    )
+    parser.add_argument(
+        "--top", type=int, default=30, help="Sequences to print."
+    )
+    parser.add_argument(
+        "--max-length", type=int, default=4, help="Longest sequence counted."
+    )
+    args = parser.parse_args()
+
+    hits, savings = Counter(), Counter()
+    with tempfile.TemporaryDirectory() as build_dir:
+        program_dirs = compile_programs(args.projects, build_dir, args.optimize)
+        vm_fnames = [
+            vm_fname
+            for program_dir in program_dirs
+            for vm_fname in sorted(glob(os.path.join(program_dir, "*.vm")))
+        ]
+        n_commands = sum(len(list(Parser.parse_lines(f))) for f in vm_fnames)
+        counts = count_sequences(vm_fnames, args.max_length)
+        for program_dir in program_dirs:
+            runner = Runner(program_dir, fuse=True)
+            runner.run(os.path.join(program_dir, "program.asm"))
+            hits.update(runner.fusion_hits)
+            savings.update(runner.fusion_savings)
+
+    print(f"{len(vm_fnames)} files, {n_commands} commands")
+    print(f"{'count':>7}  sequence")
+    for shape, count in counts.most_common(args.top):
+        print(f"{count:>7}  {shape}")
+    print()
+    print(summarize(hits, savings))
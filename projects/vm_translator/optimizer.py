@@ -0,0 +1,176 @@
+from encoder import ArithmeticEncoder, MemoryEncoder, _do_push
+
+
+# Rewrites of exact instruction sequences produced by consecutive encoders.
+# Every VM command starts by loading whatever it needs, so A and D are dead
+# between commands and only the stack contents and SP have to be preserved.
+_PATTERNS = [
+    # push x; pop y, unary op or if-goto: x stays in D for the next command
+    (_do_push() + MemoryEncoder._prep_for_pop(), []),
+    # push y; binary op: y stays in D, point A at x and drop it from the stack
+    (_do_push() + ArithmeticEncoder._LOAD_BINARY, ["@SP", "AM=M-1"]),
+]
+
+
+def _split(code):
+    """
+    Splits a C instruction into its dest, comp and jump parts.
+    """
+    dest, _, rest = code.rpartition("=")
+    comp, _, jmp = rest.partition(";")
+    return dest, comp, jmp
+
+
+def _is_label(code):
+    return code.startswith("(")
+
+
+def _is_a_instruction(code):
+    return code.startswith("@")
+
+
+class PeepholeOptimizer(object):
+    """
+    Rewrites translated assembly to remove stack round trips between
+    adjacent VM commands, reloads of an address already in A, and D and A
+    values that are overwritten before they are read.
+
+    Lines are (code, comment) pairs. Comments of removed lines move to the
+    next surviving line.
+    """
+
+    def __init__(self):
+        self.lines_in = 0
+        self.lines_out = 0
+
+    def optimize(self, lines):
+        codes = [code for code, _ in lines]
+        comments = [comment for _, comment in lines]
+        self.lines_in += len(codes)
+
+        changed = True
+        while changed:
+            changed = False
+            for rewrite in [
+                self._rewrite_patterns,
+                self._drop_redundant_a_loads,
+                self._drop_dead_stores,
+            ]:
+                new_codes, new_comments = rewrite(codes, comments)
+                changed = changed or len(new_codes) != len(codes)
+                codes, comments = new_codes, new_comments
+
+        self.lines_out += len(codes)
+        return list(zip(codes, comments))
+
+    @staticmethod
+    def _rewrite_patterns(codes, comments):
+        out_codes = []
+        out_comments = []
+        pending = []
+        idx = 0
+        while idx < len(codes):
+            for pattern, replacement in _PATTERNS:
+                if codes[idx : idx + len(pattern)] == pattern:
+                    pending.extend(
+                        c for c in comments[idx : idx + len(pattern)] if c
+                    )
+                    matched = replacement
+                    idx += len(pattern)
+                    break
+            else:
+                matched = None
+
+            if matched is None:
+                matched = [codes[idx]]
+                if comments[idx]:
+                    pending.append(comments[idx])
+                idx += 1
+
+            for code in matched:
+                out_codes.append(code)
+                out_comments.append(", ".join(pending) if pending else None)
+                pending = []
+
+        return PeepholeOptimizer._flush(out_codes, out_comments, pending)
+
+    @staticmethod
+    def _drop_redundant_a_loads(codes, comments):
+        keep = []
+        a_val = None
+        for code in codes:
+            if _is_label(code):
+                a_val = None
+                keep.append(True)
+            elif _is_a_instruction(code):
+                keep.append(code != a_val)
+                a_val = code
+            else:
+                if "A" in _split(code)[0]:
+                    a_val = None
+                keep.append(True)
+
+        return PeepholeOptimizer._filter(codes, comments, keep)
+
+    @staticmethod
+    def _drop_dead_stores(codes, comments):
+        keep = [True] * len(codes)
+        for idx, code in enumerate(codes):
+            if _is_a_instruction(code):
+                keep[idx] = not PeepholeOptimizer._is_dead(codes, idx, "A")
+            elif not _is_label(code):
+                dest, _, jmp = _split(code)
+                if dest == "D" and not jmp:
+                    is_dead = PeepholeOptimizer._is_dead(codes, idx, "D")
+                    keep[idx] = not is_dead
+
+        return PeepholeOptimizer._filter(codes, comments, keep)
+
+    @staticmethod
+    def _is_dead(codes, idx, reg):
+        """
+        Whether the value written to reg at idx is overwritten before being
+        read. Labels and jumps end the search, the value is then assumed live.
+        """
+        for pos in range(idx + 1, len(codes)):
+            code = codes[pos]
+            if _is_label(code):
+                return False
+            if _is_a_instruction(code):
+                if reg == "A":
+                    return True
+                continue
+
+            dest, comp, jmp = _split(code)
+            if reg == "A":
+                reads = "A" in comp or "M" in comp or "M" in dest or jmp
+            else:
+                reads = "D" in comp or jmp
+            if reads:
+                return False
+            if reg in dest:
+                return True
+
+        return False
+
+    @staticmethod
+    def _filter(codes, comments, keep):
+        out_codes = []
+        out_comments = []
+        pending = []
+        for code, comment, kept in zip(codes, comments, keep):
+            if comment:
+                pending.append(comment)
+            if kept:
+                out_codes.append(code)
+                out_comments.append(", ".join(pending) if pending else None)
+                pending = []
+
+        return PeepholeOptimizer._flush(out_codes, out_comments, pending)
+
+    @staticmethod
+    def _flush(codes, comments, pending):
+        if pending and codes:
+            last = [comments[-1]] if comments[-1] else []
+            comments[-1] = ", ".join(last + pending)
+        return codes, comments
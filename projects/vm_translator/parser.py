@@ -52,26 +52,33 @@ class Parser(object):
     @classmethod
     def parse_lines(cls, fname):
         with open(fname, "r") as f:
-            for line in f:
-                tokens = cls._parse_line(line)
-                if not tokens:
-                    continue
+            yield from cls.parse_commands(map(cls._parse_line, f))
 
-                cmd = tokens[0]
-                if cmd in cls.ARITHMETIC_CMDS:
+    @classmethod
+    def parse_commands(cls, commands):
+        """
+        Classifies commands already split into tokens, such as the Jack
+        compiler builds in memory. Empty commands are skipped.
+        """
+        for tokens in commands:
+            if not tokens:
+                continue
+
+            cmd = tokens[0]
+            if cmd in cls.ARITHMETIC_CMDS:
+                cls._assert_num_args(0, tokens[1:], cmd)
+                yield tokens, cls.C_ARITHMETIC
+            elif cmd in cls.MEMORY_CMDS:
+                cls._assert_num_args(2, tokens[1:], cmd)
+                yield tokens, cls.C_MEMORY
+            elif cmd in cls.FLOW_CONTROL_CMDS:
+                cls._assert_num_args(1, tokens[1:], cmd)
+                yield tokens, cls.C_FLOW_CONTROL
+            elif cmd in cls.FUNCTION_CMDS:
+                if cmd == "return":
                     cls._assert_num_args(0, tokens[1:], cmd)
-                    yield tokens, cls.C_ARITHMETIC
-                elif cmd in cls.MEMORY_CMDS:
-                    cls._assert_num_args(2, tokens[1:], cmd)
-                    yield tokens, cls.C_MEMORY
-                elif cmd in cls.FLOW_CONTROL_CMDS:
-                    cls._assert_num_args(1, tokens[1:], cmd)
-                    yield tokens, cls.C_FLOW_CONTROL
-                elif cmd in cls.FUNCTION_CMDS:
-                    if cmd == "return":
-                        cls._assert_num_args(0, tokens[1:], cmd)
-                    else:
-                        cls._assert_num_args(2, tokens[1:], cmd)
-                    yield tokens, cls.C_FUNCTION
                 else:
-                    raise ParsingException(f'Unknown command "{cmd}"')
+                    cls._assert_num_args(2, tokens[1:], cmd)
+                yield tokens, cls.C_FUNCTION
+            else:
+                raise ParsingException(f'Unknown command "{cmd}"')
@@ -1,59 +1,292 @@
 from encoder import (
+    CALL_ROUTINE,
+    COMPARISON_ROUTINES,
     ArithmeticEncoder,
     MemoryEncoder,
     FlowControlEncoder,
     FunctionEncoder,
     InitEncoder,
+    RoutineEncoder,
 )
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from fusion import MAX_LENGTH, SuperinstructionEncoder
 from glob import glob
+from itertools import islice, repeat
 import os
+from optimizer import PeepholeOptimizer
 from parser import Parser
+from top_of_stack import TopOfStackEncoder
+
+
+# assembly lines joined into each write to the output file
+CHUNK_LINES = 4096
+
+
+def translate_file(vm_fname, options):
+    """
+    Translates one .vm file on its own with the given Runner options, as
+    worker processes do. Returns the assembly text, the entry labels of the
+    shared routines it jumps to, and the fusion hits and savings.
+    """
+    runner = Runner(vm_fname, **options)
+    text = "".join(runner._format(runner._translate_file(vm_fname)))
+    return text, runner._routines, runner.fusion_hits, runner.fusion_savings
 
 
 class Runner(object):
-    def __init__(self, input_fname):
+    """
+    Translates .vm files as a pipeline of generators: parsed commands are
+    encoded into (asm_line, comment) pairs, formatted into text lines and
+    written out in chunks.
+
+    Files are translated independently of each other, so with jobs > 1 each
+    one goes to a worker process and the results are concatenated in file
+    name order. The output does not depend on the number of jobs. For the
+    same reason, given a TranslationCache, files translated before with the
+    same content and options are read back instead.
+
+    With fuse, common sequences of commands are encoded as superinstructions
+    wherever that is shorter than encoding them one by one. fusion_hits and
+    fusion_savings count the superinstructions used and the instructions
+    they saved per pattern, over every file translated, read from the cache
+    or translated by a worker included.
+
+    With tos_in_d, the top of the stack is kept in D from one command to
+    the next within basic blocks, see TopOfStackEncoder.
+    """
+
+    def __init__(
+        self,
+        input_fname,
+        optimize=False,
+        shared_calls=False,
+        shared_comparisons=False,
+        fuse=False,
+        tos_in_d=False,
+        jobs=1,
+        cache=None,
+    ):
         self._in_fname = input_fname
+        # everything that affects the translation of a single file
+        self._options = {
+            "optimize": optimize,
+            "shared_calls": shared_calls,
+            "shared_comparisons": shared_comparisons,
+            "fuse": fuse,
+            "tos_in_d": tos_in_d,
+        }
+        self._shared_calls = shared_calls
+        self._shared_comparisons = shared_comparisons
+        self._fuse = fuse
+        self._tos_in_d = tos_in_d
+        self._jobs = jobs
+        self._cache = cache
+        self._optimizer = PeepholeOptimizer() if optimize else None
+        self._routines = set()
+        self.fusion_hits = Counter()
+        self.fusion_savings = Counter()
 
-    def run(self, out_f):
+    def run(self, out_fname):
         if os.path.isdir(self._in_fname):
-            files = glob(os.path.join(self._in_fname, "*.vm"))
+            files = sorted(glob(os.path.join(self._in_fname, "*.vm")))
         else:
             files = [self._in_fname]
 
-        with open(out_f, "w") as out_f:
-            for asm_line in InitEncoder().encode():
-                out_f.write("{}\n".format(asm_line))
+        with open(out_fname, "w") as out_f:
+            for chunk in self._translate_program(files):
+                out_f.write(chunk)
 
+    def _translate_program(self, files):
+        """
+        Yields the program's assembly text in chunks.
+        """
+        # the bootstrap calls Sys.init, so only programs with one get it
+        has_sys = any(os.path.basename(f) == "Sys.vm" for f in files)
+        if has_sys:
+            init_encoder = InitEncoder(shared_calls=self._shared_calls)
+            yield "".join(f"{asm_line}\n" for asm_line in init_encoder.encode())
+
+        self._routines = set()
+        if has_sys and self._shared_calls:
+            self._routines.add(CALL_ROUTINE)
+        if self._jobs > 1 or self._cache is not None:
+            for text, routines, hits, savings in self._translate_texts(files):
+                self._routines.update(routines)
+                self.fusion_hits.update(hits)
+                self.fusion_savings.update(savings)
+                yield text
+        else:
             for vm_file in files:
-                self._translate_file(vm_file, out_f)
-
-    def _translate_file(self, vm_filename, out_f):
-        func_scope = None
-        for tokens, instr_type in Parser.parse_lines(vm_filename):
-
-            encoder = self._encoder_for(vm_filename, instr_type, func_scope)
-            if isinstance(
-                encoder, FunctionEncoder
-            ) and encoder.is_func_declaration(tokens[0]):
-                func_scope = tokens[1]
-
-            for idx, asm_line in enumerate(encoder.encode(*tokens)):
-                if idx == 0:
-                    comment = f'// {" ".join(tokens)}'
-                    out_f.write("{} {}\n".format(asm_line, comment))
-                else:
-                    out_f.write("{}\n".format(asm_line))
-
-    def _encoder_for(self, vm_filename, instr_type, func_scope):
-        namespace = os.path.basename(vm_filename).rstrip(".vm")
+                lines = self._format(self._translate_file(vm_file))
+                while True:
+                    chunk = "".join(islice(lines, CHUNK_LINES))
+                    if not chunk:
+                        break
+                    yield chunk
+
+        # the shared routines go last, behind a jump that halts programs
+        # running off the end of their own code
+        if self._routines:
+            routines = RoutineEncoder(self._routines).encode()
+            yield "".join(f"{asm_line}\n" for asm_line in routines)
+
+    def _translate_texts(self, files):
+        """
+        Returns the results of translate_file for every file, read from the
+        cache where possible, the rest translated in worker processes when
+        jobs > 1.
+        """
+        results = [None] * len(files)
+        keys = [None] * len(files)
+        if self._cache is not None:
+            for idx, vm_file in enumerate(files):
+                keys[idx] = self._cache.key_for(vm_file, self._options)
+                results[idx] = self._cache.get(keys[idx])
+
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        args = ([files[idx] for idx in missing], repeat(self._options))
+        if self._jobs > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+                translated = list(executor.map(translate_file, *args))
+        else:
+            translated = list(map(translate_file, *args))
+
+        for idx, result in zip(missing, translated):
+            results[idx] = result
+            if self._cache is not None:
+                self._cache.put(keys[idx], *result)
+        return results
+
+    def translate_units(self, units):
+        """
+        Yields the (asm_line, comment) pairs of a program held in memory as
+        (class_name, commands) units, commands being token lists as
+        Parser.parse_commands takes them. The units are translated in the
+        order given, as run translates a directory of their .vm files, but
+        without reading or writing any file.
+        """
+        has_sys = any(name == "Sys" for name, _ in units)
+        if has_sys:
+            init_encoder = InitEncoder(shared_calls=self._shared_calls)
+            yield from zip(init_encoder.encode(), repeat(None))
+
+        self._routines = set()
+        if has_sys and self._shared_calls:
+            self._routines.add(CALL_ROUTINE)
+        for name, commands in units:
+            lines = self._encode(name, Parser.parse_commands(commands))
+            yield from self._optimized(lines)
+
+        if self._routines:
+            routines = RoutineEncoder(self._routines).encode()
+            yield from zip(routines, repeat(None))
+
+    def _translate_file(self, vm_filename):
+        """
+        Yields (asm_line, comment) pairs for one .vm file, the comment being
+        the VM command on the first line of its translation.
+        """
+        return self._optimized(self._encode_file(vm_filename))
+
+    def _optimized(self, lines):
+        if self._optimizer is not None:
+            lines = self._optimizer.optimize(list(lines))
+        return lines
+
+    def _encode_file(self, vm_filename):
+        namespace = os.path.splitext(os.path.basename(vm_filename))[0]
+        return self._encode(namespace, Parser.parse_lines(vm_filename))
+
+    def _encode(self, namespace, commands):
         encoders = {
-            Parser.C_ARITHMETIC: ArithmeticEncoder(),
+            Parser.C_ARITHMETIC: ArithmeticEncoder(
+                namespace, shared_comparisons=self._shared_comparisons
+            ),
             Parser.C_MEMORY: MemoryEncoder(namespace),
-            Parser.C_FLOW_CONTROL: FlowControlEncoder(func_scope),
-            Parser.C_FUNCTION: FunctionEncoder(namespace),
+            Parser.C_FLOW_CONTROL: FlowControlEncoder(None),
+            Parser.C_FUNCTION: FunctionEncoder(
+                namespace, shared_calls=self._shared_calls
+            ),
         }
+        fusion = None
+        if self._fuse:
+            fusion = SuperinstructionEncoder(namespace, None)
+        tos = None
+        if self._tos_in_d:
+            tos = TopOfStackEncoder(encoders, self._shared_comparisons)
+        # commands ahead of the one being encoded, for fusion to look at
+        window = deque()
+        commands = iter(commands)
+        while True:
+            window.extend(islice(commands, MAX_LENGTH - len(window)))
+            if not window:
+                break
+            if fusion is not None:
+                fused = self._fuse_commands(fusion, encoders, window)
+                if fused is not None:
+                    # superinstructions work on the stack in RAM
+                    if tos is not None:
+                        yield from zip(tos.spill(), repeat(None))
+                    yield from fused
+                    continue
+
+            tokens, instr_type = window.popleft()
+            if instr_type == Parser.C_FUNCTION:
+                if FunctionEncoder.is_func_declaration(tokens[0]):
+                    # labels are scoped to the function they appear in
+                    flow_encoder = FlowControlEncoder(tokens[1])
+                    encoders[Parser.C_FLOW_CONTROL] = flow_encoder
+                    if fusion is not None:
+                        fusion = SuperinstructionEncoder(namespace, tokens[1])
+                elif self._shared_calls:
+                    self._routines.add(CALL_ROUTINE)
+            elif self._shared_comparisons and tokens[0] in COMPARISON_ROUTINES:
+                self._routines.add(COMPARISON_ROUTINES[tokens[0]])
+
+            if tos is not None:
+                asm_lines = tos.encode(instr_type, *tokens)
+            else:
+                asm_lines = encoders[instr_type].encode(*tokens)
+            comment = " ".join(tokens)
+            for asm_line in asm_lines:
+                yield asm_line, comment
+                comment = None
+
+        if tos is not None:
+            yield from zip(tos.spill(), repeat(None))
+
+    def _fuse_commands(self, fusion, encoders, window):
+        """
+        Returns the (asm_line, comment) pairs of a superinstruction for the
+        commands at the start of window, removing them from it, or None if
+        none applies or it would not be shorter than the separate commands.
+        The comment lists all the commands on the first line.
+        """
+        name, length = fusion.match([tokens for tokens, _ in window])
+        if name is None:
+            return None
+        matched = list(islice(window, length))
+        # encoding the commands separately also validates them
+        n_separate = sum(
+            len(encoders[instr_type].encode(*tokens))
+            for tokens, instr_type in matched
+        )
+        fused = fusion.encode(name, [tokens for tokens, _ in matched])
+        if len(fused) >= n_separate:
+            return None
 
-        if instr_type not in encoders:
-            raise ValueError(f"Unexpected instruction type {instr_type}")
+        for _ in range(length):
+            window.popleft()
+        self.fusion_hits[name] += 1
+        self.fusion_savings[name] += n_separate - len(fused)
+        comment = "; ".join(" ".join(tokens) for tokens, _ in matched)
+        return zip(fused, [comment] + [None] * (len(fused) - 1))
 
-        return encoders[instr_type]
+    @staticmethod
+    def _format(lines):
+        for asm_line, comment in lines:
+            if comment:
+                yield f"{asm_line} // {comment}\n"
+            else:
+                yield f"{asm_line}\n"
@@ -0,0 +1,101 @@
+import argparse
+from glob import glob
+import os
+import sys
+import tempfile
+import time
+
+from runner import Runner
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toolchain import import_tool  # noqa: E402
+
+
+_PROJECTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_SOURCES = [
+    os.path.join(os.path.dirname(_PROJECTS_DIR), "tools", "OS"),
+    os.path.join(_PROJECTS_DIR, "09"),
+]
+
+
+def build_corpus(sources, tmp_dir):
+    """
+    Returns the text of every .vm file under the source directories, and of
+    every .jack file compiled with the Python compiler. Jack files it cannot
+    compile are reported and left out.
+    """
+    engine_module = import_tool("compiler", "compilation_engine")
+    texts = []
+    for source in sources:
+        for fname in sorted(glob(os.path.join(source, "**"), recursive=True)):
+            if fname.endswith(".jack"):
+                vm_fname = os.path.join(tmp_dir, f"{len(texts)}.vm")
+                try:
+                    engine_module.CompilationEngine(fname).compile(vm_fname)
+                except engine_module.CompilationException as e:
+                    print(f"Skipping {fname}: {e}")
+                    continue
+                fname = vm_fname
+            elif not fname.endswith(".vm"):
+                continue
+
+            with open(fname, "r") as f:
+                texts.append(f.read())
+
+    return "".join(texts)
+
+
+def _time_best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure VM translator throughput on a corpus made of "
+        "the Jack OS and the project 09 programs concatenated into one file."
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=_DEFAULT_SOURCES,
+        help="Directories of .vm and .jack files. Defaults to the Jack OS and "
+        "project 09.",
+    )
+    parser.add_argument(
+        "--copies",
+        type=int,
+        default=20,
+        help="Number of times the corpus is repeated in the input file.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per mode, best is kept."
+    )
+    parser.add_argument("--optimize", action="store_true")
+    parser.add_argument("--shared-calls", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vm_fname = os.path.join(tmp_dir, "Corpus.vm")
+        with open(vm_fname, "w") as f:
+            f.write(build_corpus(args.sources, tmp_dir) * args.copies)
+        with open(vm_fname, "r") as f:
+            n_lines = sum(1 for _ in f)
+
+        runner = Runner(
+            vm_fname, optimize=args.optimize, shared_calls=args.shared_calls
+        )
+        asm_fname = os.path.join(tmp_dir, "Corpus.asm")
+        seconds = _time_best_of(lambda: runner.run(asm_fname), args.repeat)
+        with open(asm_fname, "r") as f:
+            n_asm_lines = sum(1 for _ in f)
+
+    print(f"{'vm lines':<12}{n_lines:>12}")
+    print(f"{'asm lines':<12}{n_asm_lines:>12}")
+    print(f"{'seconds':<12}{seconds:>12.3f}")
+    print(f"{'lines/s':<12}{n_lines / seconds:>12.0f}")
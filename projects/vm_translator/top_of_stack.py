@@ -0,0 +1,127 @@
+from encoder import (
+    PUSH,
+    POP,
+    ADD,
+    SUB,
+    NEG,
+    AND,
+    OR,
+    NOT,
+    AbstractEncoder,
+    ArithmeticEncoder,
+    MemoryEncoder,
+    _cheapest,
+)
+from parser import Parser
+
+
+# writes the top of the stack held in D back onto the stack
+_SPILL = ["@SP", "AM=M+1", "A=A-1", "M=D"]
+_POP_TO_D = ["@SP", "AM=M-1", "D=M"]
+
+# D op x for the top of the stack held in D and x on the stack below it,
+# with A pointing at x
+_BINARY_OPS = {ADD: "D=D+M", SUB: "D=M-D", AND: "D=D&M", OR: "D=D|M"}
+_UNARY_OPS = {NEG: "D=-D", NOT: "D=!D"}
+
+
+class TopOfStackEncoder(AbstractEncoder):
+    """
+    Encodes commands keeping the top of the stack in D instead of in RAM
+    while it is consumed by the next commands of the same basic block. SP
+    then points where the cached value belongs, one below the logical top.
+
+    The value is written back to the stack, spilled, before labels, jumps,
+    calls, returns and function declarations, so every jump lands with the
+    whole stack in RAM as the other encoders expect. A conditional jump
+    consumes the cached value, so both of its paths start spilled too.
+
+    encoders maps command types to the Runner's encoders, looked up on every
+    command since the flow control encoder changes with each function.
+    """
+
+    def __init__(self, encoders, shared_comparisons=False):
+        self._encoders = encoders
+        self._shared_comparisons = shared_comparisons
+        self._cached = False
+
+    def spill(self):
+        """
+        Lines writing a cached top of the stack back to RAM, if any.
+        """
+        if not self._cached:
+            return []
+        self._cached = False
+        return _SPILL[:]
+
+    def encode(self, instr_type, cmd, *args):
+        if instr_type == Parser.C_MEMORY:
+            if cmd == PUSH:
+                return self._encode_push(*args)
+            return self._encode_pop(*args)
+        elif instr_type == Parser.C_ARITHMETIC:
+            if cmd in _UNARY_OPS:
+                return self._fill() + [_UNARY_OPS[cmd]]
+            elif cmd in _BINARY_OPS:
+                return self._fill() + ["@SP", "AM=M-1", _BINARY_OPS[cmd]]
+            elif not self._shared_comparisons:
+                return self._encode_comp(cmd)
+        elif cmd == "if-goto":
+            flow = self._encoders[Parser.C_FLOW_CONTROL]
+            label = flow._scoped_label_for(args[0])
+            lines = self._fill() + [f"@{label}", "D;JNE"]
+            self._cached = False
+            return lines
+
+        # everything else works on the stack in RAM
+        lines = self.spill()
+        lines.extend(self._encoders[instr_type].encode(cmd, *args))
+        return lines
+
+    def _fill(self):
+        """
+        Lines caching the top of the stack in D, if not already.
+        """
+        if self._cached:
+            return []
+        self._cached = True
+        return _POP_TO_D[:]
+
+    def _encode_push(self, seg_name, index):
+        memory = self._encoders[Parser.C_MEMORY]
+        lines = self.spill()
+        lines.extend(memory.load(seg_name, index))
+        self._cached = True
+        return lines
+
+    def _encode_pop(self, seg_name, index):
+        memory = self._encoders[Parser.C_MEMORY]
+        if not self._cached:
+            return memory.encode(POP, seg_name, index)
+        self._cached = False
+
+        unrolled = memory.address(seg_name, index) + ["M=D"]
+        if seg_name not in MemoryEncoder.POINTER_SEGMENTS_MAP:
+            return unrolled
+        # a computed address has to be kept clear of the value in D
+        reg = MemoryEncoder.POINTER_SEGMENTS_MAP[seg_name]
+        computed = ["@R13", "M=D", f"@{reg}", "D=M", f"@{index}", "D=D+A"]
+        computed.extend(["@R14", "M=D", "@R13", "D=M", "@R14", "A=M", "M=D"])
+        return _cheapest(unrolled, computed)
+
+    def _encode_comp(self, cmd):
+        arithmetic = self._encoders[Parser.C_ARITHMETIC]
+        _, true_label, end_label = arithmetic._comp_labels(cmd)
+        return self._fill() + [
+            "@SP",
+            "AM=M-1",
+            "D=M-D",
+            f"@{true_label}",
+            ArithmeticEncoder._JUMPS[cmd],
+            "D=0",
+            f"@{end_label}",
+            "0;JMP",
+            f"({true_label})",
+            "D=-1",
+            f"({end_label})",
+        ]